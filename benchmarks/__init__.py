@@ -0,0 +1,5 @@
+"""
+Benchmarks of dosa against a local fake DigitalOcean API
+
+    $ python -m benchmarks --images 5000 --droplets 2000 --latency 0.02
+"""
@@ -0,0 +1,135 @@
+import argparse
+import base64
+import os
+import statistics
+import tempfile
+import time
+
+import dosa
+from dosa.metrics import MetricsCollector
+
+from benchmarks.fake_api import FakeAPI
+
+
+def bench_collection_all(client, args):
+    client.images.all()
+    client.droplets.all()
+
+
+def bench_images_search(client, args):
+    client.images.search('ubuntu', region='sgp1')
+
+
+def bench_droplets_create(client, args):
+    for i in range(args.creates):
+        client.droplets.create(name='bench-%s' % i, region='nyc1',
+                               size='1gb', image='ubuntu-18-04-x64')
+
+
+def bench_droplets_create_many(client, args):
+    client.droplets.create_many(
+        names=['bench-%s' % i for i in range(args.creates)],
+        region='nyc1', size='1gb', image='ubuntu-18-04-x64')
+
+
+def bench_firewall_add_droplet(client, args):
+    firewall = client.firewalls.get_by_name('firewall-0')
+    droplet_ids = [droplet['id'] for droplet in client.droplets.list(
+        per_page=args.creates).result['droplets']]
+    for droplet_id in droplet_ids:
+        firewall.add_droplet(droplet_id)
+    firewall.remove_droplets(droplet_ids)
+
+
+def bench_sync_ssh_keys(client, args):
+    with tempfile.TemporaryDirectory() as keysdir:
+        for i in range(args.creates):
+            public_key = 'ssh-rsa %s local%s' % (
+                base64.b64encode(b'local key %d' % i).decode(), i)
+            with open(os.path.join(keysdir, 'local%s.pub' % i), 'w') as f:
+                f.write(public_key)
+        client.sync_ssh_keys(keysdir)
+
+
+BENCHMARKS = [
+    ('collection_all', bench_collection_all),
+    ('images_search', bench_images_search),
+    ('droplets_create', bench_droplets_create),
+    ('droplets_create_many', bench_droplets_create_many),
+    ('firewall_add_droplet', bench_firewall_add_droplet),
+    ('sync_ssh_keys', bench_sync_ssh_keys),
+]
+
+
+def run(name, bench, args):
+    """Runs a benchmark `args.repeat` times, each on a fresh API"""
+    timings = []
+    collector = MetricsCollector()
+    for i in range(args.repeat):
+        api = FakeAPI(images=args.images, droplets=args.droplets,
+                      ssh_keys=args.ssh_keys, latency=args.latency,
+                      max_per_page=args.max_per_page,
+                      rate_limit=args.rate_limit,
+                      error_rate=args.error_rate)
+        with api:
+            client = dosa.Client('bench-%s-%s' % (name, i),
+                                 api_url=api.url,
+                                 pool_size=args.pool_size,
+                                 max_workers=args.max_workers,
+                                 transport=args.transport)
+            client.add_hook('post_request', collector)
+            started = time.perf_counter()
+            bench(client, args)
+            timings.append(time.perf_counter() - started)
+            client.close()
+
+    summary = collector.summary()
+    requests = sum(stats['count'] for stats in summary.values())
+    p50s = [stats['p50'] for stats in summary.values()]
+    p99s = [stats['p99'] for stats in summary.values()]
+    return {
+        'name': name,
+        'seconds': statistics.median(timings),
+        'requests': requests // args.repeat,
+        'req_per_s': requests / sum(timings),
+        'p50': max(p50s) if p50s else 0,
+        'p99': max(p99s) if p99s else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark dosa against a local fake API')
+    parser.add_argument('--images', type=int, default=5000)
+    parser.add_argument('--droplets', type=int, default=2000)
+    parser.add_argument('--ssh-keys', type=int, default=20)
+    parser.add_argument('--creates', type=int, default=50,
+                        help='droplets/keys/firewall members per benchmark')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds added to every response')
+    parser.add_argument('--max-per-page', type=int, default=200)
+    parser.add_argument('--rate-limit', type=int, default=100000)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--pool-size', type=int, default=dosa.POOL_SIZE)
+    parser.add_argument('--max-workers', type=int, default=dosa.MAX_WORKERS)
+    parser.add_argument('--transport', default=None,
+                        help="dosa transport, eg. 'http.client'")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('benchmarks', nargs='*',
+                        help='benchmarks to run, all by default: %s' %
+                        ', '.join(name for name, bench in BENCHMARKS))
+    args = parser.parse_args()
+
+    print('%-22s %10s %9s %10s %9s %9s' % (
+        'benchmark', 'seconds', 'requests', 'req/s', 'p50 (s)', 'p99 (s)'))
+    for name, bench in BENCHMARKS:
+        if args.benchmarks and name not in args.benchmarks:
+            continue
+        result = run(name, bench, args)
+        print('%(name)-22s %(seconds)10.3f %(requests)9d %(req_per_s)10.1f '
+              '%(p50)9.3f %(p99)9.3f' % result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Local stand-in for DigitalOcean API v2, enough of it for benchmarks
+
+    api = FakeAPI(images=5000, droplets=2000, latency=0.02)
+    api.start()
+    client = dosa.Client('token', api_url=api.url)
+    ...
+    api.stop()
+"""
+import base64
+import hashlib
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+REGIONS = ['nyc1', 'nyc3', 'sfo2', 'ams3', 'sgp1', 'lon1', 'fra1', 'tor1',
+           'blr1']
+DISTRIBUTIONS = ['Ubuntu', 'Debian', 'CentOS', 'Fedora', 'FreeBSD',
+                 'CoreOS']
+SIZES = ['512mb', '1gb', '2gb', '4gb', 's-1vcpu-1gb', 's-2vcpu-4gb']
+
+
+def make_images(count):
+    rand = random.Random(count)
+    images = []
+    for i in range(count):
+        distribution = rand.choice(DISTRIBUTIONS)
+        images.append({
+            'id': 1000 + i,
+            'name': '%s %s snapshot %s' % (distribution, i % 40, i),
+            'distribution': distribution,
+            'slug': (i % 5 == 0 and '%s-%s-x64' % (
+                distribution.lower(), i) or None),
+            'public': i % 5 == 0,
+            'regions': rand.sample(REGIONS, 3),
+            'min_disk_size': 20,
+            'type': 'snapshot'})
+    return images
+
+
+def make_droplet(id, name, status='active', region='nyc1', size='1gb'):
+    return {
+        'id': id,
+        'name': name,
+        'status': status,
+        'region': {'slug': region},
+        'size_slug': size,
+        'networks': {'v4': [{'ip_address': '10.0.%s.%s' % (
+            id // 250 % 250, id % 250), 'type': 'public'}]},
+        'tags': []}
+
+
+def fingerprint(public_key):
+    digest = hashlib.md5(base64.b64decode(public_key.split()[1])).hexdigest()
+    return ':'.join(digest[i:i + 2] for i in range(0, len(digest), 2))
+
+
+class FakeAPI(object):
+    """
+    In memory API state served over http on localhost
+
+    @images, @droplets, @ssh_keys, @firewalls: number of objects
+    @latency: seconds each response is delayed by
+    @max_per_page: largest page size served, like API's cap of 200
+    @rate_limit: requests allowed per hour, sent as RateLimit-* headers
+    @error_rate: fraction of GET, PUT and DELETE requests answered with
+        a 500 or 429, POSTs are spared as clients don't retry them
+    """
+
+    def __init__(self, images=100, droplets=100, ssh_keys=10, firewalls=5,
+                 latency=0, max_per_page=200, rate_limit=5000,
+                 error_rate=0, port=0):
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.port = port
+        self.lock = threading.Lock()
+        self.ids = itertools.count(10 ** 6)
+        self.random = random.Random(0)
+        self.requests = 0
+        self.reset_at = int(time.time()) + 3600
+        self.remaining = rate_limit
+        self.collections = {
+            'images': make_images(images),
+            'droplets': [make_droplet(100 + i, 'node-%s' % i)
+                         for i in range(droplets)],
+            'sizes': [{'slug': slug, 'available': True} for slug in SIZES],
+            'regions': [{'slug': slug} for slug in REGIONS],
+            'ssh_keys': [],
+            'firewalls': [],
+        }
+        for i in range(ssh_keys):
+            public_key = 'ssh-rsa %s key%s' % (
+                base64.b64encode(b'key %d' % i).decode(), i)
+            self.collections['ssh_keys'].append({
+                'id': 500 + i, 'name': 'key%s' % i,
+                'public_key': public_key,
+                'fingerprint': fingerprint(public_key)})
+        for i in range(firewalls):
+            self.collections['firewalls'].append({
+                'id': str(uuid.UUID(int=i)), 'name': 'firewall-%s' % i,
+                'droplet_ids': [], 'inbound_rules': [],
+                'outbound_rules': [], 'tags': []})
+        self.server = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s' % self.server.server_address[1]
+
+    def start(self):
+        api = self
+
+        class Handler(RequestHandler):
+            pass
+
+        Handler.api = api
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def rate_limit_headers(self):
+        with self.lock:
+            self.requests += 1
+            now = int(time.time())
+            if now >= self.reset_at:
+                self.reset_at = now + 3600
+                self.remaining = self.rate_limit
+            self.remaining = max(self.remaining - 1, 0)
+            return {'RateLimit-Limit': str(self.rate_limit),
+                    'RateLimit-Remaining': str(self.remaining),
+                    'RateLimit-Reset': str(self.reset_at)}
+
+    def injected_error(self, method):
+        if method == 'POST' or not self.error_rate:
+            return None
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+        if failed:
+            return self.random.choice((429, 500))
+        return None
+
+    def handle(self, method, path, params, body):
+        """Returns (status, response object or None)"""
+        path = path.strip('/')
+        if path.startswith('v2/'):
+            path = path[3:]
+        if path.startswith('account/keys'):
+            path = 'ssh_keys' + path[len('account/keys'):]
+        parts = path.split('/')
+        name = parts[0]
+        if name not in self.collections:
+            return 404, {'id': 'not_found', 'message': path}
+        objects = self.collections[name]
+
+        if len(parts) == 1:
+            if method == 'GET':
+                return 200, self.page(name, objects, params)
+            if method == 'POST':
+                return self.create(name, body)
+            return 405, None
+
+        obj = self.find(objects, parts[1])
+        if obj is None:
+            return 404, {'id': 'not_found', 'message': path}
+        if len(parts) == 2:
+            if method == 'GET':
+                return 200, {name[:-1]: obj}
+            if method == 'PUT':
+                obj.update(body)
+                return 200, {name[:-1]: obj}
+            if method == 'DELETE':
+                with self.lock:
+                    objects.remove(obj)
+                return 204, None
+        if name == 'firewalls' and parts[2:] == ['droplets']:
+            ids = body.get('droplet_ids', [])
+            with self.lock:
+                if method == 'POST':
+                    obj['droplet_ids'].extend(
+                        id for id in ids if id not in obj['droplet_ids'])
+                elif method == 'DELETE':
+                    obj['droplet_ids'] = [
+                        id for id in obj['droplet_ids'] if id not in ids]
+            return 204, None
+        return 404, {'id': 'not_found', 'message': path}
+
+    def find(self, objects, id):
+        for obj in objects:
+            if str(obj.get('id', obj.get('slug'))) == id:
+                return obj
+        return None
+
+    def page(self, name, objects, params):
+        per_page = min(int(params.get('per_page', 20)), self.max_per_page)
+        page = int(params.get('page', 1))
+        total = len(objects)
+        start = (page - 1) * per_page
+        result = {name: objects[start:start + per_page],
+                  'links': {}, 'meta': {'total': total}}
+        if start + per_page < total:
+            result['links']['pages'] = {
+                'next': '%s/v2/%s?page=%s&per_page=%s' % (
+                    self.url, name, page + 1, per_page)}
+        return result
+
+    def create(self, name, body):
+        with self.lock:
+            if name == 'droplets':
+                names = body.get('names') or [body['name']]
+                droplets = [make_droplet(next(self.ids), droplet_name,
+                                         'new', body.get('region'),
+                                         body.get('size'))
+                            for droplet_name in names]
+                self.collections['droplets'].extend(droplets)
+                if 'names' in body:
+                    return 202, {'droplets': droplets}
+                return 202, {'droplet': droplets[0]}
+            obj = dict(body, id=next(self.ids))
+            if name == 'firewalls':
+                obj['id'] = str(uuid.uuid4())
+                obj.setdefault('droplet_ids', [])
+            if name == 'ssh_keys':
+                obj['fingerprint'] = fingerprint(obj['public_key'])
+            self.collections[name].append(obj)
+            return 201, {name[:-1]: obj}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are separate writes, don't let them wait on acks
+    disable_nagle_algorithm = True
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, method):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        body = json.loads(raw.decode('utf-8')) if raw.strip() else {}
+        if self.api.latency:
+            time.sleep(self.api.latency)
+
+        headers = self.api.rate_limit_headers()
+        status = self.api.injected_error(method)
+        if status:
+            result = {'id': 'error', 'message': 'injected error'}
+            if status == 429:
+                headers['Retry-After'] = '0'
+        else:
+            status, result = self.api.handle(
+                method, url.path, dict(parse_qsl(url.query)), body)
+
+        payload = b'' if result is None else json.dumps(result).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def do_PUT(self):
+        self.respond('PUT')
+
+    def do_DELETE(self):
+        self.respond('DELETE')
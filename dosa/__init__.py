@@ -1,19 +1,54 @@
+import base64
 import glob
+import hashlib
 import json
 import logging
 import math
 import os
+import threading
+import time
 
 from os.path import basename
 from collections import namedtuple
-
-import requests
-
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from dosa import models
+from dosa.cache import (ResponseCache, SingleFlight, ValidatorCache, make_key,
+                        paths_related)
+from dosa.codec import default_codec
+from dosa.exceptions import (  # noqa: F401
+    APIConnectionError, APIError, ClientError, NameNotFoundError,
+    NotFoundError, PartialCreateError, RateLimitError, ServerError,
+    TransportError, error_class)
+from dosa.index import NameIndex
+from dosa.metrics import HOOK_EVENTS, RequestEvent, path_template
+from dosa.ratelimit import get_governor
+from dosa.retry import RETRY_STATUSES, RetryPolicy
+from dosa.transport import get_transport
+
+API_URL = 'https://api.digitalocean.com'
 API_VERSION = 'v2'
 __version__ = '1.0.0'
 DEBUG = False
+POOL_SIZE = 10
+MAX_WORKERS = 4
+MAX_PER_PAGE = 200
+# max droplets created by a single multi-create request
+MAX_DROPLETS_PER_CREATE = 10
+# max droplet ids sent in a single firewall droplets request
+MAX_FIREWALL_DROPLETS = 50
+# max number of accounts a ClientPool works on concurrently
+MAX_ACCOUNTS = 8
+CACHE_SIZE = 256
+# seconds a Resource's snapshot is read from before it is fetched again
+SNAPSHOT_MAX_AGE = 5
+# seconds list responses of read mostly collections are cached for
+CACHE_TTLS = {'sizes': 3600, 'regions': 3600, 'images': 600}
 
 Return = namedtuple('Return', ('status_code', 'result'))
+# an object listed by ClientPool, with name of the account it came from
+AccountItem = namedtuple('AccountItem', ('account', 'item'))
 
 
 def set_debug():
@@ -23,10 +58,16 @@ def set_debug():
     DEBUG = True
 
 
-def show_debug_hints(req_type, endpoint, data, headers, resp):
-    if DEBUG:
-        logging.debug('http status code: %s' % resp.status_code)
-        logging.debug('response body: %s' % resp.text)
+class CurlCommand(object):
+    """curl command equivalent to a request, built only when logged"""
+
+    def __init__(self, req_type, endpoint, data, headers):
+        self.req_type = req_type
+        self.endpoint = endpoint
+        self.data = data
+        self.headers = headers
+
+    def __str__(self):
         headers_s = ''.join(
             ' -H ' +
             '"%s: %s"' %
@@ -34,39 +75,222 @@ def show_debug_hints(req_type, endpoint, data, headers, resp):
              v) for (
                 k,
                 v) in list(
-                headers.items()))
-        curl_cmd = 'curl -X %s %s -d "%s" %s' % (
-            req_type, endpoint, json.dumps(data), headers_s)
-        logging.debug(curl_cmd)
+                self.headers.items()))
+        return 'curl -X %s %s -d "%s" %s' % (
+            self.req_type, self.endpoint, json.dumps(self.data), headers_s)
+
+
+def show_debug_hints(req_type, endpoint, data, headers, resp):
+    if DEBUG and logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug('http status code: %s', resp.status_code)
+        logging.debug('response body: %s', resp.text)
+        logging.debug('%s', CurlCommand(req_type, endpoint, data, headers))
+
+
+class Session(object):
+    """
+    Keep-alive connection pool shared by a Client and all of its
+    collections and resources
+
+    @pool_size: max number of connections kept open to the API host
+    @max_workers: max number of requests a single call (eg.
+        Collection.all) may run concurrently
+    @cache_size: max number of GET responses kept in cache
+    @retry: RetryPolicy for failed requests, default one if None
+    @api_url: API server, eg. a local stand-in for tests and benchmarks
+    @codec: JSON codec of request and response bodies, see dosa.codec
+    @transport: name of a dosa.transport backend (eg. 'http.client') or
+        a transport object, default one if None
+    """
+
+    def __init__(self, api_key, pool_size=POOL_SIZE, max_workers=MAX_WORKERS,
+                 cache_size=CACHE_SIZE, retry=None, api_url=API_URL,
+                 codec=None, transport=None):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.codec = codec or default_codec()
+        self.retry = retry or RetryPolicy()
+        self.pool_size = pool_size
+        self.max_workers = min(max_workers, pool_size)
+        self.cache = ResponseCache(cache_size)
+        self.validators = ValidatorCache(cache_size)
+        # GETs in flight, identical ones are sent once
+        self.inflight = SingleFlight()
+        # event -> callables, called with a RequestEvent
+        self.hooks = dict((event, []) for event in HOOK_EVENTS)
+        # rate limit budget is per token, shared with other sessions
+        self.governor = get_governor(api_key)
+        # built once, sent as is with every request
+        self.headers = {
+            'authorization': 'Bearer %s' % api_key,
+            'Content-Type': 'application/json'}
+        self.transport = get_transport(
+            transport, pool_size=pool_size, api_url=api_url)
+
+    def request(self, req_type, endpoint, params, data, headers=None):
+        """
+        @headers: sent in addition to default headers
+
+        Failed requests are retried as per session's retry policy, the
+        last response is returned once retries are exhausted.
+        Raises APIConnectionError if no response could be received.
+        """
+        headers = dict(self.headers, **headers) if headers else self.headers
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self.governor.acquire()
+            try:
+                resp = self.transport.request(
+                    req_type, endpoint, params, data, headers)
+            except TransportError as e:
+                if not self.retry.should_retry(
+                        req_type, attempt, sent=e.sent):
+                    raise APIConnectionError(
+                        str(e), method=req_type, path=endpoint,
+                        elapsed=time.monotonic() - started) from e
+                self.retry.wait(attempt)
+                attempt += 1
+                continue
+
+            self.governor.update(resp.headers)
+            if (resp.status_code in RETRY_STATUSES and
+                    self.retry.should_retry(
+                        req_type, attempt, status_code=resp.status_code)):
+                self.retry.wait(attempt, resp.headers.get('Retry-After'))
+                attempt += 1
+                continue
+            return resp
+
+    def add_hook(self, event, hook):
+        """
+        @event: 'pre_request' or 'post_request'
+        @hook: callable, called with a RequestEvent
+        """
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        self.hooks[event].remove(hook)
+
+    def close(self):
+        self.transport.close()
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(api_key):
+    """
+    Returns the default Session for `api_key`, used by objects created
+    outside of a Client, eg. Firewall(api_key, 'firewalls/{id}', id=id)
+    """
+    with _sessions_lock:
+        if api_key not in _sessions:
+            _sessions[api_key] = Session(api_key)
+        return _sessions[api_key]
 
 
 class APIObject(object):
 
+    session = None
+
     def __init__(self, api_key, name, path=None, **kw):
         self.api_key = api_key
         self.name = name
         path = path or name
+        self.path_template = path
         self.path = path.format(**kw)
         for (k, v) in list(kw.items()):
             setattr(self, k, v)
+        if self.session is None:
+            self.session = get_session(api_key)
 
-    def send_req(self, req_type, path, data={}, params={}):
-        req_calls = {
-            'GET': requests.get,
-            'POST': requests.post,
-            'DELETE': requests.delete,
-            'PUT': requests.put}
-        headers = {
-            'authorization': 'Bearer %s' % self.api_key,
-            'Content-Type': 'application/json'}
-        endpoint = 'https://api.digitalocean.com/%s/%s' % (API_VERSION, path)
-        req_call = req_calls[req_type]
-        resp = req_call(
-            endpoint,
-            params=params,
-            data=json.dumps(data),
-            headers=headers)
+    def send_req(self, req_type, path, data={}, params={}, ttl=None,
+                 store=True):
+        """
+        @ttl: seconds a GET response may be served from session's cache.
+            Any other request drops cached responses of related paths.
+        @store: keep GET response in session's caches, False for
+            responses the caller drops once read (eg. pages turned into
+            models), so they can be freed
+
+        GETs are sent with validators (ETag/Last-Modified) of the previous
+        response of same path and params, if server answers 304 Not
+        Modified, previous result is returned.
+
+        A GET identical (same path and params) to one already in flight
+        is not sent, caller waits for and shares result of the latter.
+        """
+        if req_type != 'GET':
+            return self.send(req_type, path, data, params, ttl)
+        if ttl:
+            cached = self.session.cache.get(path, params)
+            if cached is not None:
+                return cached
+        return self.session.inflight.do(
+            make_key(path, params), self.send, req_type, path, data,
+            params, ttl, True, store)
+
+    def send(self, req_type, path, data, params, ttl, conditional=True,
+             store=True):
+        """
+        Sends request, see send_req
+        @conditional: send GETs with stored validators
+        """
+        cache = self.session.cache
+        validators = self.session.validators
+        headers = None
+        # a GET sent before a write (eg. by another thread) completes
+        # may return stale data, it is not stored then
+        generation = cache.generation
+        if req_type == 'GET' and conditional:
+            headers = validators.headers(path, params)
+
+        endpoint = '%s/%s/%s' % (self.session.api_url, API_VERSION, path)
+        hooks = self.session.hooks
+        event = None
+        if hooks['pre_request'] or hooks['post_request']:
+            event = RequestEvent(
+                req_type, path_template(self.path_template, self.path, path),
+                path, None, None, None)
+            for hook in hooks['pre_request']:
+                hook(event)
+
+        # nothing to send, eg. GETs and DELETEs by id
+        body = self.session.codec.dumps(data) if data else None
+        started = time.monotonic()
+        try:
+            resp = self.session.request(
+                req_type, endpoint, params, body, headers)
+        except APIConnectionError:
+            for hook in hooks['post_request']:
+                hook(event._replace(duration=time.monotonic() - started))
+            raise
         status_code = resp.status_code
+        content = resp.content
+
+        if hooks['post_request']:
+            event = event._replace(
+                status_code=status_code, bytes=len(content),
+                duration=time.monotonic() - started)
+            for hook in hooks['post_request']:
+                hook(event)
+
+        if req_type != 'GET':
+            cache.invalidate(path)
+            # GETs sent before this write must not be joined by later ones
+            self.session.inflight.discard_if(
+                lambda key: paths_related(key[0], path))
+        elif status_code == 304 and headers:
+            ret = validators.get(path, params)
+            if ret is not None:
+                if ttl and store:
+                    cache.set(path, params, ttl, ret, generation)
+                return ret
+            # stored result was evicted meanwhile, ask for a full one
+            return self.send(req_type, path, data, params, ttl,
+                             conditional=False, store=store)
 
         # default status for request and returned values
         failed = False
@@ -77,83 +301,274 @@ class APIObject(object):
             failed = True
 
         # If there's no response (No content), as for a DELETE method,
-        # I can't get a json object
-        if resp.text and resp.text != '':
-            ret = resp.json()
+        # I can't get a json object. Raw bytes are parsed once, no str
+        # is decoded from them unless request failed
+        if content:
+            try:
+                ret = self.session.codec.loads(content)
+            except ValueError:
+                # error pages (eg. from a proxy) may not be json
+                if not failed:
+                    raise
 
         if failed or DEBUG:
-            show_debug_hints(req_type, endpoint, data, headers, resp)
+            show_debug_hints(
+                req_type, endpoint, data, self.session.headers, resp)
 
         if failed:
-            raise Exception(resp.text)
+            raise error_class(status_code)(
+                resp.text, method=req_type, path=endpoint,
+                status_code=status_code, body=ret or resp.text,
+                elapsed=time.monotonic() - started)
 
-        return Return(status_code, ret)
+        ret = Return(status_code, ret)
+        if (req_type == 'GET' and store and
+                cache.generation == generation):
+            validators.set(path, params, resp.headers, ret)
+            if ttl:
+                cache.set(path, params, ttl, ret, generation)
+        return ret
 
 
 class Resource(APIObject):
+    """
+    Keeps result of the last info() as a snapshot, accessors (eg.
+    Droplet.status) read it and fetch a new one only once it is older
+    than `max_age` seconds (never if None)
+    """
+
+    max_age = SNAPSHOT_MAX_AGE
+    snapshot = None
+    # time.monotonic() snapshot was taken at
+    snapshot_at = None
 
     def info(self):
-        return self.send_req('GET', self.path)
+        resp = self.send_req('GET', self.path)
+        self.set_snapshot(resp.result)
+        return resp
 
     def update(self, **data):
-        return self.send_req('PUT', self.path, data)
+        resp = self.send_req('PUT', self.path, data)
+        self.snapshot = None
+        return resp
+
+    def set_snapshot(self, result):
+        """@result: as info() returns it, eg. {'droplet': {...}}"""
+        # stamped after it's set, a reader seeing the old stamp only
+        # refreshes in vain
+        self.snapshot = result
+        self.snapshot_at = time.monotonic()
+
+    def is_stale(self):
+        return self.snapshot is None or (
+            self.max_age is not None and
+            time.monotonic() - self.snapshot_at > self.max_age)
+
+    def refresh(self):
+        """Fetches a new snapshot and returns it"""
+        return self.info().result
+
+    def get_snapshot(self):
+        """Returns snapshot, fetched if there's none or it is stale"""
+        if self.is_stale():
+            return self.refresh()
+        return self.snapshot
 
 
 class Collection(APIObject):
 
-    def list(self, **params):
+    # seconds list responses are cached for, None disables caching
+    cache_ttl = None
+    # dosa.index.NameIndex of named objects, used by get_id
+    name_index = None
+    # key of objects' id, eg. domains are identified by name
+    id_key = 'id'
+    # dosa.models class objects are turned into with models=True
+    model = None
+    # Resource class of a single object, see as_resources
+    resource_class = Resource
+
+    def list(self, store=True, **params):
         """
         @params: per_page=10, page=4
             per_page: number of objects to include in result
             page: page number
+        @store: keep response in session's caches, see send_req
         """
 
         # it returns a Return nametuple object
-        return self.send_req('GET', self.path, params=params)
-
-    def all(self):
-        items = []
-        resp = self.list()
-        items.extend(resp.result[self.name])
+        return self.send_req(
+            'GET', self.path, params=params, ttl=self.cache_ttl,
+            store=store)
+
+    def invalidate(self):
+        """Drops cached responses of this collection"""
+        self.session.cache.invalidate(self.path)
+
+    def as_models(self, items):
+        """Returns list of `items` turned into collection's model"""
+        if self.model is None:
+            raise TypeError('%s has no model' % self.name)
+        model = self.model
+        return [model(item) for item in items]
+
+    def all(self, per_page=MAX_PER_PAGE, max_workers=None, models=False):
+        """
+        @per_page: number of objects fetched per request
+        @max_workers: max number of pages fetched concurrently, defaults
+            to session's max_workers
+        @models: return dosa.models objects instead of dicts. Pages are
+            not kept in session's caches then
+        """
+        resp = self.list(per_page=per_page, store=not models)
+        items = list(resp.result[self.name])
+        if not items:
+            return items
         total = resp.result['meta']['total']
-
-        # if total == len(items), math.ceil will be == 1
-        more_no_reqs = math.ceil(total / len(items))
-
-        # This seems easier to understand to me
-        for i in range(1, more_no_reqs):
-            # now I starts from 1. Getting next page
-            resp = self.list(page=(i + 1))
-            items.extend(resp.result[self.name])
+        if models:
+            items = self.as_models(items)
+
+        # API may serve less than asked per_page, so page size is the
+        # length of first page. if total == len(items) it's 1
+        no_pages = math.ceil(total / len(items))
+        if no_pages < 2:
+            return items
+
+        def get_page(page):
+            resp = self.list(per_page=per_page, page=page, store=not models)
+            if models:
+                # page dicts aren't cached, they are dropped as soon as
+                # page is converted
+                return self.as_models(resp.result[self.name])
+            return resp.result[self.name]
+
+        max_workers = min(
+            max_workers or self.session.max_workers, no_pages - 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map returns pages in order, irrespective of completion order
+            for page_items in executor.map(get_page, range(2, no_pages + 1)):
+                items.extend(page_items)
 
         return items
 
+    def iter_all(self, per_page=MAX_PER_PAGE, models=False):
+        """
+        Yields objects one at a time, following links.pages.next.
+        Next page is fetched in background while current page is consumed.
+        @models: yield dosa.models objects instead of dicts. Pages are
+            not kept in session's caches then
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self.list, per_page=per_page, store=not models)
+            yielded = 0
+            while future:
+                result = future.result().result
+                items = result[self.name]
+                yielded += len(items)
+                next_url = result.get('links', {}).get(
+                    'pages', {}).get('next')
+                future = None
+                # stop on an empty page as well, in case meta/links are off
+                if next_url and items and yielded < result['meta']['total']:
+                    params = dict(parse_qsl(urlsplit(next_url).query))
+                    future = executor.submit(
+                        self.list, store=not models, **params)
+                if models:
+                    items = self.as_models(items)
+                for item in items:
+                    yield item
+
     def create(self, **data):
-        return self.send_req('POST', self.path, data)
+        resp = self.send_req('POST', self.path, data)
+        if self.name_index is not None and resp.result:
+            # eg. {'ssh_key': {'id': 512190, 'name': 'My SSH Key', ...}}
+            obj = resp.result.get(self.name[:-1]) or {}
+            if 'name' in obj and self.id_key in obj:
+                self.name_index.add(obj['name'], obj[self.id_key])
+        return resp
 
     def delete(self, id):
         path = self.path + '/' + str(id)
-        return self.send_req('DELETE', path)
+        resp = self.send_req('DELETE', path)
+        if self.name_index is not None:
+            self.name_index.discard_id(id)
+        return resp
+
+    def as_resources(self, max_age=SNAPSHOT_MAX_AGE):
+        """
+        Returns a resource_class object per object of collection, with
+        snapshots taken from a single listing
+        """
+        key = self.name[:-1]
+        resources = []
+        for obj in self.iter_all():
+            resource = self.resource_class(
+                self.api_key, self.path + '/{id}', id=obj[self.id_key],
+                session=self.session, max_age=max_age)
+            resource.set_snapshot({key: obj})
+            resources.append(resource)
+        return resources
+
+    def populate(self, resources):
+        """
+        Sets snapshots of `resources` (eg. Droplet objects) from a single
+        listing, which is stopped as soon as all of them are found.
+        Returns resources not found
+        """
+        key = self.name[:-1]
+        pending = {}
+        for resource in resources:
+            pending.setdefault(resource.id, []).append(resource)
+        for obj in self.iter_all():
+            for resource in pending.pop(obj[self.id_key], ()):
+                resource.set_snapshot({key: obj})
+            if not pending:
+                break
+        return [resource for missing in pending.values()
+                for resource in missing]
+
+    def get_id(self, name):
+        """
+        Returns id of the object named `name`. Looked up in name index,
+        which is rebuilt from a full listing when stale or on a miss.
+        Raises NameNotFoundError if there is no such object
+        """
+        if self.name_index is None:
+            self.name_index = NameIndex()
+        object_id = self.name_index.get(name)
+        if object_id is None:
+            self.name_index.rebuild(self.iter_all(), self.id_key)
+            object_id = self.name_index.get(name)
+        if object_id is None:
+            raise NameNotFoundError('No %s named %s' % (self.name, name))
+        return object_id
 
 
 class Droplet(Resource):
 
     def ip_addresses(self):
-        networks_v4 = self.info().result['droplet']['networks']['v4']
+        networks_v4 = self.get_snapshot()['droplet']['networks']['v4']
         return [net['ip_address'] for net in networks_v4]
 
     def status(self):
-        return self.info().result['droplet']['status']
+        return self.get_snapshot()['droplet']['status']
 
 
 class Droplets(Collection):
 
-    def create(self, name, region, size, image, ssh_keys=None,
-               backups=False, ipv6=False, private_networking=False):
+    model = models.Droplet
+    resource_class = Droplet
+
+    def validate_size(self, size):
         valid_sizes = self.sizes.list().result['sizes']
         valid_size_slugs = [
             droplet_config['slug'] for droplet_config in valid_sizes]
         assert size in valid_size_slugs, 'Invalid droplet size: %s' % size
+
+    def create(self, name, region, size, image, ssh_keys=None,
+               backups=False, ipv6=False, private_networking=False):
+        self.validate_size(size)
         data = dict(
             name=name,
             region=region,
@@ -164,9 +579,141 @@ class Droplets(Collection):
             private_networking=private_networking)
         return self.send_req('POST', self.path, data)
 
+    def create_many(self, names, region, size, image, ssh_keys=None,
+                    backups=False, ipv6=False, private_networking=False,
+                    max_workers=None):
+        """
+        Creates a droplet for each name in `names`, up to
+        MAX_DROPLETS_PER_CREATE droplets per request. Requests are sent
+        concurrently. Returns list of created droplets, in order of names
+        @max_workers: max number of concurrent requests, defaults to
+            session's max_workers
+
+        If some requests fail, raises PartialCreateError once all of them
+        are done, carrying droplets created and names not created
+        """
+        self.validate_size(size)
+        names = list(names)
+        chunks = [names[i:i + MAX_DROPLETS_PER_CREATE]
+                  for i in range(0, len(names), MAX_DROPLETS_PER_CREATE)]
+
+        def create_chunk(chunk):
+            data = dict(
+                names=chunk,
+                region=region,
+                size=size,
+                image=image,
+                ssh_keys=ssh_keys,
+                backups=backups,
+                ipv6=ipv6,
+                private_networking=private_networking)
+            return self.send_req('POST', self.path, data).result['droplets']
+
+        droplets = []
+        if not chunks:
+            return droplets
+        max_workers = min(max_workers or self.session.max_workers,
+                          len(chunks))
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(create_chunk, chunk)
+                       for chunk in chunks]
+            # every chunk is waited for, droplets of other chunks are
+            # billed even if one fails
+            for chunk, future in zip(chunks, futures):
+                error = future.exception()
+                if error is None:
+                    droplets.extend(future.result())
+                else:
+                    failed.append((chunk, error))
+        if failed:
+            raise PartialCreateError(droplets, failed)
+        return droplets
+
+    def wait_until(self, ids, status='active', timeout=300, interval=2,
+                   max_interval=30):
+        """
+        Yields droplets of `ids` as they reach `status`. Every tick lists
+        the droplets collection once, instead of a request per droplet.
+        Poll interval starts at `interval` seconds and grows up to
+        `max_interval` while no droplet becomes ready.
+        Raises TimeoutError if droplets are not ready in `timeout` seconds
+        """
+        pending = set(ids)
+        deadline = time.monotonic() + timeout
+        delay = interval
+        while pending:
+            ready = []
+            seen = set()
+            for droplet in self.iter_all():
+                if droplet['id'] in pending:
+                    seen.add(droplet['id'])
+                    if droplet['status'] == status:
+                        ready.append(droplet)
+                    # rest of the pages are not needed
+                    if len(seen) == len(pending):
+                        break
+            for droplet in ready:
+                pending.discard(droplet['id'])
+                yield droplet
+            if not pending:
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Droplets not %s in %ss: %s' % (
+                    status, timeout, sorted(pending)))
+            delay = interval if ready else min(delay * 1.5, max_interval)
+            time.sleep(min(delay, remaining))
+
+
+def key_fingerprint(public_key):
+    """
+    MD5 fingerprint of an ssh public key, in the form API reports it
+    eg. 3b:16:bf:e4:8b:00:8b:b8:59:8c:a9:d3:f0:19:45:fa
+    """
+    try:
+        blob = base64.b64decode(public_key.split()[1])
+    except (IndexError, ValueError):
+        raise ValueError('Invalid ssh public key: %r' % public_key[:40])
+    digest = hashlib.md5(blob).hexdigest()
+    return ':'.join(digest[i:i + 2] for i in range(0, len(digest), 2))
+
+
+def image_matches(image, word, region=None):
+    """
+    True if `word` is found in image's distribution or slug and, when
+    `region` (lowercased) is given, image is available in it
+    """
+    distribution = image['distribution'].lower()
+    slug = image['slug'] and image['slug'].lower() or ''
+    if (word in distribution) or (word in slug):
+        if not region:
+            return True
+        else:
+            return region in image['regions']
+    return False
+
 
 class Images(Collection):
 
+    model = models.Image
+
+    # dosa.index.ImageIndex searches are served from, if set
+    index = None
+
+    def refresh_index(self):
+        """
+        Refreshes search index from the API. If API can't be reached, a
+        previously loaded index is used as is
+        """
+        try:
+            self.index.refresh(self.iter_all())
+        except APIConnectionError:
+            if not len(self.index):
+                raise
+            logging.warning('Could not refresh image index, using stale one')
+
     def search(self, word, region=None, show_op=False):
         """
         @region: <string> eg sgp1, nyc1
@@ -174,17 +721,15 @@ class Images(Collection):
         """
         region = region and region.lower()
 
-        def filter_image(image):
-            distribution = image['distribution'].lower()
-            slug = image['slug'] and image['slug'].lower() or ''
-            if (word in distribution) or (word in slug):
-                if not region:
-                    return True
-                else:
-                    return region in image['regions']
-            return False
+        if self.index is not None:
+            if self.index.is_stale():
+                self.refresh_index()
+            images = self.index.search(word, region)
+        else:
+            def filter_image(image):
+                return image_matches(image, word, region)
 
-        images = list(filter(filter_image, self.all()))
+            images = list(filter(filter_image, self.iter_all()))
 
         if show_op:
             for image in images:
@@ -195,9 +740,102 @@ class Images(Collection):
 
 class DomainRecords(Collection):
 
+    model = models.DomainRecord
+
+    # record fields besides type, name and data
+    record_attrs = ('priority', 'port', 'ttl', 'weight', 'flags', 'tag')
+
     def Record(self, record_id):
-        return Resource(self.api_key, self.path +
-                        '/{record_id}', record_id=record_id)
+        return Resource(self.api_key, self.path_template +
+                        '/{record_id}', record_id=record_id,
+                        domain=self.domain, session=self.session)
+
+    def apply(self, records, dry_run=False, prune=True,
+              ignore_types=('SOA', 'NS'), max_workers=None):
+        """
+        Makes zone records match `records`, with minimal changes
+        @records: list of dicts, eg. {'type': 'A', 'name': 'www',
+            'data': '162.10.66.0', 'ttl': 1800}. Names are relative to
+            the domain, '@' for the domain itself, as API returns them
+        @dry_run: only compute changes
+        @prune: delete existing records which are not in `records`.
+            Without it, records are only created or have their other
+            fields (eg. ttl) updated, never replaced
+        @ignore_types: existing records of these types are never deleted
+            nor replaced
+        @max_workers: max number of concurrent requests, defaults to
+            session's max_workers
+
+        Returns {'create': [record], 'update': [(existing record, record)],
+                 'delete': [existing record]}
+        """
+        def key(record):
+            return (record['type'], record['name'], record['data'])
+
+        # (type, name, data) -> existing records
+        existing = {}
+        for record in self.all():
+            existing.setdefault(key(record), []).append(record)
+
+        changes = {'create': [], 'update': [], 'delete': []}
+        unmatched = []
+        for record in records:
+            matches = existing.get(key(record))
+            if not matches:
+                unmatched.append(record)
+                continue
+            current = matches.pop()
+            if any(record[attr] != current.get(attr)
+                   for attr in self.record_attrs if attr in record):
+                changes['update'].append((current, record))
+
+        leftovers = [current for matches in existing.values()
+                     for current in matches]
+        # same type and name but different data, updated in place of a
+        # record which would be deleted anyway
+        replaceable = [current for current in leftovers
+                       if current['type'] not in ignore_types] if prune else []
+        for record in unmatched:
+            for current in replaceable:
+                if (current['type'], current['name']) == (
+                        record['type'], record['name']):
+                    replaceable.remove(current)
+                    leftovers.remove(current)
+                    changes['update'].append((current, record))
+                    break
+            else:
+                changes['create'].append(record)
+        if prune:
+            changes['delete'] = [current for current in leftovers
+                                 if current['type'] not in ignore_types]
+
+        if dry_run:
+            return changes
+
+        def create(record):
+            self.create(**record)
+
+        def update(change):
+            current, record = change
+            data = dict((k, v) for (k, v) in record.items() if k != 'type')
+            self.Record(current['id']).update(**data)
+
+        def delete(current):
+            self.delete(current['id'])
+
+        with ThreadPoolExecutor(
+                max_workers=max_workers or self.session.max_workers) as ex:
+            # deletes go first, eg. a CNAME has to go before an A record
+            # of same name is created
+            list(ex.map(delete, changes['delete']))
+            futures = ([ex.submit(update, change)
+                        for change in changes['update']] +
+                       [ex.submit(create, record)
+                        for record in changes['create']])
+            for future in futures:
+                future.result()
+
+        return changes
 
 
 class Firewall(Resource):
@@ -243,8 +881,72 @@ class Firewall(Resource):
 
             return self.send_req('DELETE', path, data)
 
+    def droplet_ids(self):
+        """Returns ids of droplets assigned to firewall"""
+        return self.info().result['firewall']['droplet_ids']
+
+    def send_droplets(self, req_type, droplet_ids):
+        """
+        POSTs or DELETEs `droplet_ids` to firewall droplets in as few
+        requests as possible
+        """
+        path = "firewalls/{id}/droplets".format(id=self.id)
+        for i in range(0, len(droplet_ids), MAX_FIREWALL_DROPLETS):
+            data = {"droplet_ids": droplet_ids[i:i + MAX_FIREWALL_DROPLETS]}
+            self.send_req(req_type, path, data)
+
+    def add_droplets(self, droplet_ids, current_ids=None):
+        """
+        Add droplets to firewall, returns ids of droplets actually added
+        @current_ids: droplets already assigned, fetched if not given
+        """
+        if current_ids is None:
+            current_ids = self.droplet_ids()
+        current_ids = set(current_ids)
+        new_ids = []
+        for droplet_id in droplet_ids:
+            if droplet_id not in current_ids:
+                current_ids.add(droplet_id)
+                new_ids.append(droplet_id)
+        self.send_droplets('POST', new_ids)
+        return new_ids
+
+    def remove_droplets(self, droplet_ids, current_ids=None):
+        """
+        Remove droplets from firewall, returns ids of droplets actually
+        removed
+        @current_ids: droplets already assigned, fetched if not given
+        """
+        if current_ids is None:
+            current_ids = self.droplet_ids()
+        current_ids = set(current_ids)
+        removed_ids = []
+        for droplet_id in droplet_ids:
+            if droplet_id in current_ids:
+                current_ids.discard(droplet_id)
+                removed_ids.append(droplet_id)
+        self.send_droplets('DELETE', removed_ids)
+        return removed_ids
+
+    def set_droplets(self, droplet_ids):
+        """
+        Makes `droplet_ids` the only droplets of firewall. Reads current
+        droplets once and sends only the difference
+        """
+        current_ids = self.droplet_ids()
+        wanted_ids = set(droplet_ids)
+        added = self.add_droplets(droplet_ids, current_ids)
+        removed = self.remove_droplets(
+            [droplet_id for droplet_id in current_ids
+             if droplet_id not in wanted_ids], current_ids)
+        return {'added': added, 'removed': removed}
+
 
 class Firewalls(Collection):
+
+    model = models.Firewall
+    resource_class = Firewall
+
     # override APIObject.create and return a Firewall object
     def create(self, **data):
         # call base method and create a firewall
@@ -254,62 +956,227 @@ class Firewalls(Collection):
         firewall_id = result['firewall']['id']
 
         # now get a Firewall instance
-        return Firewall(self.api_key, 'firewalls/{id}', id=firewall_id)
+        return Firewall(self.api_key, 'firewalls/{id}', id=firewall_id,
+                        session=self.session)
 
     def get_by_name(self, name):
-        """Return a Firewall object from a name"""
-
-        # search for a firewall rule by name:
-        # https://stackoverflow.com/a/29051598/4385116
-        data = list(filter(lambda d: d['name'] in [name], self.all()))
-
-        # get firewall id
-        firewall_id = data[0]['id']
+        """
+        Return a Firewall object from a name
+        Raises NameNotFoundError if there is no such firewall
+        """
+        firewall_id = self.get_id(name)
 
         # now get a Firewall instance
-        return Firewall(self.api_key, 'firewalls/{id}', id=firewall_id)
+        return Firewall(self.api_key, 'firewalls/{id}', id=firewall_id,
+                        session=self.session)
 
 
 class Client(object):
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, pool_size=POOL_SIZE, max_workers=MAX_WORKERS,
+                 cache_size=CACHE_SIZE, cache_ttls=None, retry=None,
+                 image_index=None, api_url=API_URL, codec=None,
+                 transport=None):
+        """
+        @pool_size: number of keep-alive connections shared by all
+            collections and resources of this client
+        @max_workers: max number of concurrent requests per call, eg. pages
+            fetched at once by Collection.all
+        @cache_size: max number of GET responses cached
+        @cache_ttls: {collection name: seconds}, overrides CACHE_TTLS
+        @retry: RetryPolicy for failed requests, eg. RetryPolicy(retries=0)
+            disables retrying
+        @image_index: dosa.index.ImageIndex images.search is served from
+        @api_url: API server, defaults to DigitalOcean's
+        @codec: JSON codec, eg. dosa.codec.JSONCodec(), defaults to the
+            fastest one installed
+        @transport: 'requests' (default), 'http.client', 'memory' or a
+            transport object, see dosa.transport
+        """
         self.api_key = api_key
-        sizes = Collection(self.api_key, 'sizes')
-        self.droplets = Droplets(self.api_key, 'droplets', sizes=sizes)
-        self.images = Images(self.api_key, 'images')
-        self.keys = Collection(self.api_key, 'ssh_keys', 'account/keys')
-        self.domains = Collection(self.api_key, 'domains')
-        self.firewalls = Firewalls(self.api_key, 'firewalls')
+        self.session = session = Session(
+            api_key, pool_size=pool_size, max_workers=max_workers,
+            cache_size=cache_size, retry=retry, api_url=api_url,
+            codec=codec, transport=transport)
+        ttls = dict(CACHE_TTLS, **(cache_ttls or {}))
+        sizes = Collection(self.api_key, 'sizes', session=session,
+                           cache_ttl=ttls.get('sizes'), model=models.Size)
+        self.droplets = Droplets(
+            self.api_key, 'droplets', sizes=sizes, session=session,
+            cache_ttl=ttls.get('droplets'))
+        self.images = Images(self.api_key, 'images', session=session,
+                             cache_ttl=ttls.get('images'), index=image_index)
+        self.regions = Collection(self.api_key, 'regions', session=session,
+                                  cache_ttl=ttls.get('regions'),
+                                  model=models.Region)
+        self.keys = Collection(
+            self.api_key, 'ssh_keys', 'account/keys', session=session,
+            cache_ttl=ttls.get('ssh_keys'), name_index=NameIndex(),
+            model=models.SSHKey)
+        self.domains = Collection(self.api_key, 'domains', session=session,
+                                  cache_ttl=ttls.get('domains'),
+                                  name_index=NameIndex(), id_key='name',
+                                  model=models.Domain)
+        self.firewalls = Firewalls(
+            self.api_key, 'firewalls', session=session,
+            cache_ttl=ttls.get('firewalls'), name_index=NameIndex())
         self.sizes = sizes
 
     def Domain(self, domain):
-        return Resource(self.api_key, 'domains/{domain}', domain=domain)
+        return Resource(self.api_key, 'domains/{domain}', domain=domain,
+                        session=self.session)
 
     def DomainRecords(self, domain, record_id=None):
         return DomainRecords(
-            self.api_key, 'domains/{domain}/records', domain=domain)
+            self.api_key, 'domain_records', 'domains/{domain}/records',
+            domain=domain, session=self.session)
 
     def Droplet(self, id):
-        return Droplet(self.api_key, 'droplets/{id}', id=id)
+        return Droplet(self.api_key, 'droplets/{id}', id=id,
+                       session=self.session)
+
+    def add_hook(self, event, hook):
+        """
+        Calls `hook` with a dosa.metrics.RequestEvent before ('pre_request')
+        or after ('post_request') every request made by this client
+        eg. client.add_hook('post_request', dosa.metrics.MetricsCollector())
+        """
+        self.session.add_hook(event, hook)
+
+    @property
+    def rate_limit(self):
+        """
+        Current RateBudget(limit, remaining, reset) of the API token, as
+        last reported by the API. Values are None till first response.
+        """
+        return self.session.governor.budget
+
+    def invalidate(self, path=None):
+        """
+        Drops cached responses of `path` (eg. 'sizes'), or all of them
+        """
+        self.session.cache.invalidate(path)
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
 
     def sync_ssh_keys(self, keysdir):
         """
         sync local ssh keys directory containing all key files
         - uploads all keys in keysdir to digitalocean
         - removes any extra keys found at digitalocean
+        keys are matched by fingerprint, so renaming a key file does not
+        upload it again. Uploads and removals are done concurrently
+        """
+        # fingerprint -> (name, public key)
+        local_keys = {}
+        for path in glob.glob(os.path.join(keysdir, '*')):
+            with open(path) as f:
+                public_key = f.read().strip()
+            local_keys[key_fingerprint(public_key)] = (
+                basename(path), public_key)
+        registered_keys = dict((key['fingerprint'], key)
+                               for key in self.keys.all())
+        new_keys = [local_keys[fingerprint] for fingerprint in local_keys
+                    if fingerprint not in registered_keys]
+        keys_to_discard = [registered_keys[fingerprint]
+                           for fingerprint in registered_keys
+                           if fingerprint not in local_keys]
+
+        def create(new_key):
+            name, public_key = new_key
+            return self.keys.create(
+                name=name, public_key=public_key).result['ssh_key']
+
+        def delete(key):
+            self.keys.delete(key['id'])
+
+        created_keys = []
+        if new_keys or keys_to_discard:
+            with ThreadPoolExecutor(
+                    max_workers=self.session.max_workers) as executor:
+                deletions = [executor.submit(delete, key)
+                             for key in keys_to_discard]
+                created_keys = list(executor.map(create, new_keys))
+                for deletion in deletions:
+                    deletion.result()
+
+        kept_keys = [key for fingerprint, key in registered_keys.items()
+                     if fingerprint in local_keys]
+        return {'new': set(name for name, public_key in new_keys),
+                'deleted': set(key['name'] for key in keys_to_discard),
+                'all_ids': [key['id'] for key in kept_keys + created_keys]}
+
+
+class ClientPool(object):
+    """
+    A Client per account, operations are run on all accounts at once.
+    Each account has its own token and so its own rate limit budget.
+
+        pool = ClientPool({'team-a': API_KEY_A, 'team-b': API_KEY_B})
+        for account, droplet in pool.all('droplets'):
+            print(account, droplet['name'])
+    """
+
+    def __init__(self, api_keys, max_accounts=MAX_ACCOUNTS, **client_kw):
+        """
+        @api_keys: {account name: api key}
+        @max_accounts: max number of accounts worked on concurrently
+        @client_kw: passed to every Client, eg. pool_size, max_workers
+        """
+        self.max_accounts = max_accounts
+        self.clients = dict((account, Client(api_key, **client_kw))
+                            for (account, api_key) in api_keys.items())
+
+    def map(self, fn, accounts=None, return_exceptions=False):
+        """
+        Calls fn(client) for every account concurrently, returns
+        {account: result} in order of accounts. An error of an account is
+        raised once all accounts are done, unless `return_exceptions`, in
+        which case it is returned as that account's result
+        @accounts: names of accounts to work on, all by default
+        """
+        accounts = list(self.clients if accounts is None else accounts)
+        results = {}
+        if not accounts:
+            return results
+        max_workers = min(self.max_accounts, len(accounts))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fn, self.clients[account])
+                       for account in accounts]
+            for account, future in zip(accounts, futures):
+                error = future.exception()
+                if error is not None and not return_exceptions:
+                    raise error
+                results[account] = (error if error is not None
+                                    else future.result())
+        return results
+
+    def merge(self, results):
+        """{account: list} -> list of AccountItems"""
+        return [AccountItem(account, item)
+                for (account, items) in results.items() for item in items]
+
+    def all(self, collection, accounts=None, **kw):
+        """
+        Returns AccountItems of all objects of `collection` (eg.
+        'droplets', 'images', 'keys') of every account
+        @kw: passed to Collection.all, eg. models=True
         """
-        local_keys = dict((basename(path), open(path).read())
-                          for path in glob.glob(os.path.join(keysdir, '*')))
-        registered_keys = dict((key['name'], key)
-                               for key in self.keys.list().result['ssh_keys'])
-        local_key_names = set(local_keys.keys())
-        registered_key_names = set(registered_keys.keys())
-        new_key_names = local_key_names.difference(registered_key_names)
-        keynames_to_discard = registered_key_names.difference(local_keys)
-        for name in new_key_names:
-            self.keys.create(name=name, public_key=local_keys[name])
-        for name in keynames_to_discard:
-            self.keys.delete(registered_keys[name]['id'])
-        final_keys = self.keys.list().result['ssh_keys']
-        return {'new': new_key_names, 'deleted': keynames_to_discard,
-                'all_ids': [key['id'] for key in final_keys]}
+        return self.merge(self.map(
+            lambda client: getattr(client, collection).all(**kw), accounts))
+
+    def search_images(self, word, region=None, accounts=None):
+        """Returns AccountItems of Images.search results of every account"""
+        return self.merge(self.map(
+            lambda client: client.images.search(word, region), accounts))
+
+    def rate_limits(self):
+        """{account: RateBudget}"""
+        return dict((account, client.rate_limit)
+                    for (account, client) in self.clients.items())
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
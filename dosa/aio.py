@@ -0,0 +1,433 @@
+"""
+asyncio flavour of dosa.Client, needs aiohttp (pip install aiohttp)
+
+    from dosa.aio import AsyncClient
+
+    async with AsyncClient(api_key=API_KEY) as client:
+        status, result = await client.droplets.list()
+        droplets = await client.droplets.all()
+"""
+import asyncio
+import logging
+import math
+import time
+
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import dosa
+from dosa import models
+from dosa import (API_URL, API_VERSION, MAX_PER_PAGE, MAX_WORKERS, POOL_SIZE,
+                  APIConnectionError, Return, error_class)
+from dosa.codec import default_codec
+from dosa.ratelimit import get_governor
+from dosa.retry import RETRY_STATUSES, RetryPolicy
+
+# what show_debug_hints needs from a response
+Response = namedtuple('Response', ('status_code', 'text'))
+
+
+class AsyncSession(object):
+    """
+    Keep-alive connection pool shared by an AsyncClient and all of its
+    collections and resources. aiohttp session is created on first
+    request, so that it is bound to the running event loop.
+
+    @pool_size: max number of connections kept open to the API host
+    @max_workers: max number of requests a single call (eg.
+        AsyncCollection.all) may run concurrently
+    @codec: JSON codec of request and response bodies, see dosa.codec
+    @retry: RetryPolicy for failed requests, default one if None
+    @api_url: API server, eg. a local stand-in for tests and benchmarks
+
+    Requests are paced by the rate limit Governor of `api_key`, shared
+    with sync Sessions of the same token.
+    """
+
+    def __init__(self, api_key, pool_size=POOL_SIZE, max_workers=MAX_WORKERS,
+                 codec=None, retry=None, api_url=API_URL):
+        if aiohttp is None:
+            raise ImportError('dosa.aio needs aiohttp: pip install aiohttp')
+        self.api_key = api_key
+        self.api_url = api_url
+        self.codec = codec or default_codec()
+        self.retry = retry or RetryPolicy()
+        self.governor = get_governor(api_key)
+        self.pool_size = pool_size
+        self.max_workers = min(max_workers, pool_size)
+        self.headers = {
+            'authorization': 'Bearer %s' % api_key,
+            'Content-Type': 'application/json'}
+        self.http = None
+
+    async def send(self, req_type, endpoint, params, data):
+        """
+        Sends request once, returns (status_code, headers, raw response
+        body). Raises aiohttp.ClientError if no response is received
+        """
+        if self.http is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.http = aiohttp.ClientSession(
+                connector=connector, headers=self.headers)
+        async with self.http.request(
+                req_type, endpoint, params=params, data=data) as resp:
+            return resp.status, resp.headers, await resp.read()
+
+    async def request(self, req_type, endpoint, params, data):
+        """
+        Returns (status_code, raw response body). Failed requests are
+        retried as per session's retry policy, see Session.request.
+        Raises APIConnectionError if no response could be received.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            delay = self.governor.take()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                status_code, headers, content = await self.send(
+                    req_type, endpoint, params, data)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # on connect failure, request surely didn't reach the API
+                sent = not isinstance(e, aiohttp.ClientConnectorError)
+                if not self.retry.should_retry(req_type, attempt, sent=sent):
+                    raise APIConnectionError(
+                        str(e) or type(e).__name__, method=req_type,
+                        path=endpoint,
+                        elapsed=time.monotonic() - started) from e
+                await asyncio.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+
+            self.governor.update(headers)
+            if (status_code in RETRY_STATUSES and
+                    self.retry.should_retry(
+                        req_type, attempt, status_code=status_code)):
+                await asyncio.sleep(self.retry.delay(
+                    attempt, headers.get('Retry-After')))
+                attempt += 1
+                continue
+            return status_code, content
+
+    async def close(self):
+        if self.http is not None:
+            await self.http.close()
+            self.http = None
+
+
+class AsyncAPIObject(object):
+
+    session = None
+
+    def __init__(self, api_key, name, path=None, **kw):
+        self.api_key = api_key
+        self.name = name
+        path = path or name
+        self.path = path.format(**kw)
+        for (k, v) in list(kw.items()):
+            setattr(self, k, v)
+        if self.session is None:
+            self.session = AsyncSession(api_key)
+
+    async def send_req(self, req_type, path, data={}, params={}):
+        endpoint = '%s/%s/%s' % (self.session.api_url, API_VERSION, path)
+        codec = self.session.codec
+        body = codec.dumps(data) if data else None
+        started = time.monotonic()
+        status_code, content = await self.session.request(
+            req_type, endpoint, params, body)
+
+        failed = status_code not in (200, 201, 202, 204)
+        ret = None
+        if content:
+            try:
+                ret = codec.loads(content)
+            except ValueError:
+                if not failed:
+                    raise
+
+        if failed or dosa.DEBUG:
+            text = content.decode('utf-8', 'replace')
+            dosa.show_debug_hints(
+                req_type, endpoint, data, self.session.headers,
+                Response(status_code, text))
+
+        if failed:
+            raise error_class(status_code)(
+                text, method=req_type, path=endpoint,
+                status_code=status_code, body=ret or text,
+                elapsed=time.monotonic() - started)
+
+        return Return(status_code, ret)
+
+
+class AsyncResource(AsyncAPIObject):
+
+    async def info(self):
+        return await self.send_req('GET', self.path)
+
+    async def update(self, **data):
+        return await self.send_req('PUT', self.path, data)
+
+
+class AsyncCollection(AsyncAPIObject):
+
+    # dosa.models class objects are turned into with models=True
+    model = None
+
+    async def list(self, **params):
+        """
+        @params: per_page=10, page=4
+            per_page: number of objects to include in result
+            page: page number
+        """
+        return await self.send_req('GET', self.path, params=params)
+
+    def as_models(self, items):
+        """Returns list of `items` turned into collection's model"""
+        if self.model is None:
+            raise TypeError('%s has no model' % self.name)
+        model = self.model
+        return [model(item) for item in items]
+
+    async def all(self, per_page=MAX_PER_PAGE, max_workers=None,
+                  models=False):
+        """
+        @per_page: number of objects fetched per request
+        @max_workers: max number of pages fetched concurrently, defaults
+            to session's max_workers
+        @models: return dosa.models objects instead of dicts
+        """
+        resp = await self.list(per_page=per_page)
+        items = list(resp.result[self.name])
+        if not items:
+            return items
+        no_pages = math.ceil(resp.result['meta']['total'] / len(items))
+        if models:
+            items = self.as_models(items)
+        if no_pages < 2:
+            return items
+
+        semaphore = asyncio.Semaphore(max_workers or self.session.max_workers)
+
+        async def get_page(page):
+            async with semaphore:
+                resp = await self.list(per_page=per_page, page=page)
+            if models:
+                return self.as_models(resp.result[self.name])
+            return resp.result[self.name]
+
+        # gather keeps pages in order
+        pages = await asyncio.gather(
+            *(get_page(page) for page in range(2, no_pages + 1)))
+        for page_items in pages:
+            items.extend(page_items)
+        return items
+
+    async def iter_all(self, per_page=MAX_PER_PAGE, models=False):
+        """
+        Yields objects one at a time, following links.pages.next.
+        Next page is fetched in background while current page is consumed.
+        @models: yield dosa.models objects instead of dicts
+        """
+        task = asyncio.ensure_future(self.list(per_page=per_page))
+        yielded = 0
+        try:
+            while task:
+                result = (await task).result
+                items = result[self.name]
+                yielded += len(items)
+                next_url = result.get('links', {}).get(
+                    'pages', {}).get('next')
+                task = None
+                if next_url and items and yielded < result['meta']['total']:
+                    params = dict(parse_qsl(urlsplit(next_url).query))
+                    task = asyncio.ensure_future(self.list(**params))
+                if models:
+                    items = self.as_models(items)
+                for item in items:
+                    yield item
+        finally:
+            if task:
+                task.cancel()
+
+    async def create(self, **data):
+        return await self.send_req('POST', self.path, data)
+
+    async def delete(self, id):
+        path = self.path + '/' + str(id)
+        return await self.send_req('DELETE', path)
+
+
+class AsyncDroplet(AsyncResource):
+
+    async def ip_addresses(self):
+        networks_v4 = (await self.info()).result['droplet']['networks']['v4']
+        return [net['ip_address'] for net in networks_v4]
+
+    async def status(self):
+        return (await self.info()).result['droplet']['status']
+
+
+class AsyncDroplets(AsyncCollection):
+
+    model = models.Droplet
+
+    async def create(self, name, region, size, image, ssh_keys=None,
+                     backups=False, ipv6=False, private_networking=False):
+        valid_sizes = (await self.sizes.list()).result['sizes']
+        valid_size_slugs = [
+            droplet_config['slug'] for droplet_config in valid_sizes]
+        assert size in valid_size_slugs, 'Invalid droplet size: %s' % size
+        data = dict(
+            name=name,
+            region=region,
+            size=size,
+            image=image,
+            ssh_keys=ssh_keys,
+            backups=backups,
+            private_networking=private_networking)
+        return await self.send_req('POST', self.path, data)
+
+
+class AsyncImages(AsyncCollection):
+
+    model = models.Image
+
+    async def search(self, word, region=None, show_op=False):
+        """
+        @region: <string> eg sgp1, nyc1
+        @show_op: prints output
+        """
+        region = region and region.lower()
+        images = [image async for image in self.iter_all()
+                  if dosa.image_matches(image, word, region)]
+
+        if show_op:
+            for image in images:
+                print(image['slug'], image['id'], image['distribution'])
+
+        return images
+
+
+class AsyncDomainRecords(AsyncCollection):
+
+    model = models.DomainRecord
+
+    def Record(self, record_id):
+        return AsyncResource(self.api_key, self.path +
+                             '/{record_id}', record_id=record_id,
+                             session=self.session)
+
+
+class AsyncFirewall(AsyncResource):
+
+    async def add_droplet(self, droplet_id):
+        """Add droplet to firewall"""
+        droplet_ids = (await self.info()).result['firewall']['droplet_ids']
+
+        if droplet_id in droplet_ids:
+            logging.warning(
+                "Droplet {d} has already firewall {f}".format(
+                    d=droplet_id, f=self.id))
+            return
+
+        path = "firewalls/{id}/droplets".format(id=self.id)
+        data = {"droplet_ids": [droplet_id]}
+        return await self.send_req('POST', path, data)
+
+    async def remove_droplet(self, droplet_id):
+        """Remove droplet from firewall"""
+        droplet_ids = (await self.info()).result['firewall']['droplet_ids']
+
+        if droplet_id not in droplet_ids:
+            logging.warning(
+                "Droplet {d} hasn't firewall {f}".format(
+                    d=droplet_id, f=self.id))
+            return
+
+        path = "firewalls/{id}/droplets".format(id=self.id)
+        data = {"droplet_ids": [droplet_id]}
+        return await self.send_req('DELETE', path, data)
+
+
+class AsyncFirewalls(AsyncCollection):
+
+    model = models.Firewall
+
+    async def create(self, **data):
+        status, result = await super().create(**data)
+        firewall_id = result['firewall']['id']
+        return AsyncFirewall(self.api_key, 'firewalls/{id}', id=firewall_id,
+                             session=self.session)
+
+    async def get_by_name(self, name):
+        """Return an AsyncFirewall object from a name"""
+        async for firewall in self.iter_all():
+            if firewall['name'] == name:
+                return AsyncFirewall(self.api_key, 'firewalls/{id}',
+                                     id=firewall['id'], session=self.session)
+
+        raise dosa.NameNotFoundError('No firewalls named %s' % name)
+
+
+class AsyncClient(object):
+
+    def __init__(self, api_key, pool_size=POOL_SIZE, max_workers=MAX_WORKERS,
+                 codec=None, retry=None, api_url=API_URL):
+        """
+        @pool_size: number of keep-alive connections shared by all
+            collections and resources of this client
+        @max_workers: max number of concurrent requests per call, eg. pages
+            fetched at once by AsyncCollection.all
+        @codec: JSON codec, defaults to the fastest one installed
+        @retry: RetryPolicy for failed requests, eg. RetryPolicy(retries=0)
+            disables retrying
+        @api_url: API server, defaults to DigitalOcean's
+        """
+        self.api_key = api_key
+        self.session = session = AsyncSession(
+            api_key, pool_size=pool_size, max_workers=max_workers,
+            codec=codec, retry=retry, api_url=api_url)
+        sizes = AsyncCollection(self.api_key, 'sizes', session=session,
+                                model=models.Size)
+        self.droplets = AsyncDroplets(
+            self.api_key, 'droplets', sizes=sizes, session=session)
+        self.images = AsyncImages(self.api_key, 'images', session=session)
+        self.keys = AsyncCollection(
+            self.api_key, 'ssh_keys', 'account/keys', session=session,
+            model=models.SSHKey)
+        self.domains = AsyncCollection(
+            self.api_key, 'domains', session=session, model=models.Domain)
+        self.firewalls = AsyncFirewalls(
+            self.api_key, 'firewalls', session=session)
+        self.sizes = sizes
+
+    def Domain(self, domain):
+        return AsyncResource(self.api_key, 'domains/{domain}', domain=domain,
+                             session=self.session)
+
+    def DomainRecords(self, domain, record_id=None):
+        return AsyncDomainRecords(
+            self.api_key, 'domain_records', 'domains/{domain}/records',
+            domain=domain, session=self.session)
+
+    def Droplet(self, id):
+        return AsyncDroplet(self.api_key, 'droplets/{id}', id=id,
+                            session=self.session)
+
+    async def close(self):
+        """Release pooled connections"""
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
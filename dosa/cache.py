@@ -0,0 +1,215 @@
+"""
+In memory caches shared by all the objects of a dosa.Session
+"""
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Thread safe mapping holding at most `maxsize` keys, least recently
+    used keys are evicted first
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.data:
+                return default
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            return self.data.pop(key, default)
+
+    def discard_if(self, predicate):
+        """Removes all keys for which predicate(key) is true"""
+        with self.lock:
+            for key in [key for key in self.data if predicate(key)]:
+                del self.data[key]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+def make_key(path, params):
+    return (path, tuple(sorted(params.items())))
+
+
+def paths_related(path, other):
+    """
+    True if one path is same as or nested under other,
+    eg. droplets and droplets/1234
+    """
+    return (path == other or path.startswith(other + '/') or
+            other.startswith(path + '/'))
+
+
+class ResponseCache(object):
+    """
+    TTL cache of GET responses keyed by path and params
+    Cached results are shared by all callers and must be treated as
+    read only.
+
+    `generation` is bumped by every invalidate, a response requested
+    before an invalidation is not cached once it arrives, see set.
+
+    @maxsize: max number of responses kept
+    """
+
+    def __init__(self, maxsize=256):
+        self.entries = LRUCache(maxsize)
+        self.lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, path, params):
+        key = make_key(path, params)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.entries.pop(key)
+            return None
+        return value
+
+    def set(self, path, params, ttl, value, generation=None):
+        """
+        @generation: cache's generation when value was requested, value
+            is dropped if cache has been invalidated since. Returns True
+            if value was cached
+        """
+        expires_at = time.monotonic() + ttl
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self.entries.set(make_key(path, params), (expires_at, value))
+        return True
+
+    def invalidate(self, path=None):
+        """
+        Drops cached responses of `path` and of paths nested under or
+        above it. Drops everything if no path is given
+        """
+        with self.lock:
+            self.generation += 1
+            if path is None:
+                self.entries.clear()
+            else:
+                self.entries.discard_if(
+                    lambda key: paths_related(key[0], path))
+
+
+class ValidatorCache(object):
+    """
+    Remembers ETag/Last-Modified validators of GET responses along with
+    their result, so that later GETs can be made conditional and a 304
+    answered from memory. Stored results are shared by all callers and
+    must be treated as read only.
+
+    @maxsize: max number of responses kept
+    """
+
+    def __init__(self, maxsize=256):
+        self.entries = LRUCache(maxsize)
+
+    def headers(self, path, params):
+        """Returns conditional request headers for path, if any"""
+        entry = self.entries.get(make_key(path, params))
+        if entry is None:
+            return None
+        etag, last_modified, value = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def get(self, path, params):
+        entry = self.entries.get(make_key(path, params))
+        return entry and entry[2]
+
+    def set(self, path, params, response_headers, value):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        key = make_key(path, params)
+        if etag or last_modified:
+            self.entries.set(key, (etag, last_modified, value))
+        else:
+            self.entries.pop(key)
+
+
+class Call(object):
+    """A call of SingleFlight.do others may wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs a function once for concurrent callers of the same key, callers
+    arriving while it runs wait for it and share its result (or error)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn, *args):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                # may have been discarded, and replaced by a newer call
+                if self.calls.get(key) is call:
+                    del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def discard_if(self, predicate):
+        """
+        Forgets calls in progress whose key matches, later callers start
+        a new call instead of joining them. Callers already waiting still
+        get their result
+        """
+        with self.lock:
+            for key in [key for key in self.calls if predicate(key)]:
+                del self.calls[key]
+
+    def __len__(self):
+        return len(self.calls)
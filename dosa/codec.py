@@ -0,0 +1,48 @@
+"""
+JSON encoding of request bodies and decoding of response bodies
+
+    client = dosa.Client(API_KEY, codec=JSONCodec())
+
+Default codec is orjson's if it is installed (pip install dosa[fast]),
+stdlib json otherwise. Any object having dumps(obj) -> str or bytes and
+loads(bytes) -> obj, raising ValueError on bad input, may be used.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONCodec(object):
+    """stdlib json"""
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def loads(self, data):
+        # detects utf-8/16/32 of bytes itself, no need to decode first
+        return json.loads(data)
+
+
+class OrjsonCodec(object):
+    """orjson, several times faster than stdlib json on large pages"""
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError('OrjsonCodec needs orjson: pip install orjson')
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        # orjson.JSONDecodeError is a ValueError
+        return orjson.loads(data)
+
+
+def default_codec():
+    """Returns fastest codec available"""
+    if orjson is not None:
+        return OrjsonCodec()
+    return JSONCodec()
@@ -0,0 +1,99 @@
+"""
+Exceptions raised by dosa
+"""
+
+
+class APIError(Exception):
+    """
+    Raised when a request to the API fails
+
+    @method: http method, eg. GET
+    @path: requested endpoint
+    @status_code: http status code, None if no response was received
+    @body: response body
+    @elapsed: seconds spent on the request, retries included
+    """
+
+    def __init__(self, message, method=None, path=None, status_code=None,
+                 body=None, elapsed=None):
+        super().__init__(message)
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.body = body
+        self.elapsed = elapsed
+
+
+class APIConnectionError(APIError):
+    """Connection to the API failed, no response received"""
+
+
+class ClientError(APIError):
+    """API rejected the request, 4xx status"""
+
+
+class NotFoundError(ClientError):
+    """404 Not Found"""
+
+
+class RateLimitError(ClientError):
+    """429 Too Many Requests, rate limit is exhausted"""
+
+
+class ServerError(APIError):
+    """API failed to serve the request, 5xx status"""
+
+
+class PartialCreateError(APIError):
+    """
+    Requests of a batch create failed, others may have succeeded
+
+    @created: objects the successful requests created
+    @failed: list of (names, exception) of each failed request, first
+        one's APIError attributes are copied
+    """
+
+    def __init__(self, created, failed):
+        error = failed[0][1]
+        no_failed = sum(len(names) for names, _ in failed)
+        super().__init__(
+            '%s of %s objects not created: %s' % (
+                no_failed, no_failed + len(created), error),
+            **dict((attr, getattr(error, attr, None)) for attr in (
+                'method', 'path', 'status_code', 'body', 'elapsed')))
+        self.created = created
+        self.failed = failed
+
+    @property
+    def failed_names(self):
+        return [name for names, error in self.failed for name in names]
+
+
+class TransportError(Exception):
+    """
+    Raised by transports when no response could be received
+
+    @sent: False if request surely didn't reach the server, eg. connection
+        was refused, so it is safe to send again
+    """
+
+    def __init__(self, message, sent=True):
+        super().__init__(message)
+        self.sent = sent
+
+
+class NameNotFoundError(LookupError):
+    """No object of a collection has the looked up name"""
+
+
+def error_class(status_code):
+    """Returns APIError subclass for a failed request's status code"""
+    if status_code == 404:
+        return NotFoundError
+    if status_code == 429:
+        return RateLimitError
+    if 400 <= status_code < 500:
+        return ClientError
+    if status_code >= 500:
+        return ServerError
+    return APIError
@@ -0,0 +1,230 @@
+"""
+Client side indexes over collections
+
+ImageIndex: search index over the image catalog, used by Images.search
+
+    index = ImageIndex('~/.cache/dosa/images.json')
+    client = dosa.Client(API_KEY, image_index=index)
+    client.images.search('ubuntu', 'sgp1')
+
+NameIndex: name -> id of named objects, used by Collection.get_id
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from collections import defaultdict
+
+INDEX_VERSION = 1
+# fields of an image indexed for search
+INDEXED_FIELDS = ('distribution', 'slug', 'name')
+
+
+def trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def fingerprint(image):
+    return hashlib.md5(
+        json.dumps(image, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ImageIndex(object):
+    """
+    Trigram index on lowercased distribution, slug and name of images and
+    a bitset of regions per image. Catalog is persisted to `path` (if
+    given) and index is rebuilt from it on load, so searches work offline.
+
+    @path: json file the catalog is stored in
+    @max_age: seconds after which index is considered stale
+    """
+
+    def __init__(self, path=None, max_age=600):
+        self.path = path and os.path.expanduser(path)
+        self.max_age = max_age
+        self.updated_at = None
+        self.lock = threading.Lock()
+        self.images = {}
+        self.fingerprints = {}
+        # id -> position of image in catalog
+        self.positions = {}
+        # field -> trigram -> set of image ids
+        self.postings = dict((field, defaultdict(set))
+                             for field in INDEXED_FIELDS)
+        # region slug -> bit, image id -> regions bitset
+        self.region_bits = {}
+        self.image_regions = {}
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    def __len__(self):
+        return len(self.images)
+
+    def is_stale(self):
+        return (self.updated_at is None or
+                time.time() - self.updated_at > self.max_age)
+
+    def add(self, image, position):
+        image_id = image['id']
+        self.images[image_id] = image
+        self.positions[image_id] = position
+        self.fingerprints[image_id] = fingerprint(image)
+        for field in INDEXED_FIELDS:
+            for trigram in trigrams((image.get(field) or '').lower()):
+                self.postings[field][trigram].add(image_id)
+        bits = 0
+        for region in image.get('regions') or ():
+            if region not in self.region_bits:
+                self.region_bits[region] = 1 << len(self.region_bits)
+            bits |= self.region_bits[region]
+        self.image_regions[image_id] = bits
+
+    def remove(self, image_id):
+        image = self.images.pop(image_id)
+        del self.fingerprints[image_id]
+        del self.positions[image_id]
+        del self.image_regions[image_id]
+        for field in INDEXED_FIELDS:
+            postings = self.postings[field]
+            for trigram in trigrams((image.get(field) or '').lower()):
+                postings[trigram].discard(image_id)
+                if not postings[trigram]:
+                    del postings[trigram]
+
+    def refresh(self, images):
+        """
+        Updates index from an iterable of the whole catalog, only images
+        added, changed or removed since last refresh are (re)indexed.
+        Returns number of images (re)indexed or removed
+        """
+        # fetch catalog before locking, searches go on meanwhile
+        images = list(images)
+        with self.lock:
+            return self.update(images)
+
+    def update(self, images):
+        seen = set()
+        changes = 0
+        for position, image in enumerate(images):
+            image_id = image['id']
+            seen.add(image_id)
+            if self.fingerprints.get(image_id) == fingerprint(image):
+                self.positions[image_id] = position
+                continue
+            if image_id in self.images:
+                self.remove(image_id)
+            self.add(image, position)
+            changes += 1
+        for image_id in [id for id in self.images if id not in seen]:
+            self.remove(image_id)
+            changes += 1
+        self.updated_at = time.time()
+        if self.path:
+            self.save()
+        return changes
+
+    def search(self, word, region=None, fields=('distribution', 'slug')):
+        """
+        Returns images having `word` in any of `fields` (lowercased) and,
+        if `region` is given, available in it. Same matching as
+        dosa.image_matches with default fields
+        """
+        with self.lock:
+            return self.lookup(word, region, fields)
+
+    def lookup(self, word, region, fields):
+        if len(word) >= 3:
+            word_trigrams = trigrams(word)
+            candidates = set()
+            for field in fields:
+                postings = self.postings[field]
+                matched = set.intersection(
+                    *[postings.get(trigram, set())
+                      for trigram in word_trigrams])
+                candidates.update(matched)
+        else:
+            candidates = set(self.images)
+
+        if region:
+            bit = self.region_bits.get(region, 0)
+            candidates = [image_id for image_id in candidates
+                          if self.image_regions[image_id] & bit]
+
+        matches = [image_id for image_id in candidates if any(
+            word in (self.images[image_id].get(field) or '').lower()
+            for field in fields)]
+        matches.sort(key=self.positions.get)
+        return [self.images[image_id] for image_id in matches]
+
+    def load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            return
+        for position, image in enumerate(data['images']):
+            self.add(image, position)
+        self.updated_at = data['updated_at']
+
+    def save(self):
+        images = sorted(self.images.values(),
+                        key=lambda image: self.positions[image['id']])
+        data = {'version': INDEX_VERSION,
+                'updated_at': self.updated_at,
+                'images': images}
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmp_path = '%s.%s.tmp' % (self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        # readers never see a half written file
+        os.replace(tmp_path, self.path)
+
+
+class NameIndex(object):
+    """
+    name -> id of a collection's objects. Entries are trusted for
+    `max_age` seconds after the index was built, then index has to be
+    rebuilt from a fresh listing.
+
+    @max_age: seconds after which index is considered stale
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self.updated_at = None
+        self.lock = threading.Lock()
+        self.ids = {}
+
+    def is_stale(self):
+        return (self.updated_at is None or
+                time.time() - self.updated_at > self.max_age)
+
+    def get(self, name):
+        """Returns id of `name`, None if unknown or index is stale"""
+        if self.is_stale():
+            return None
+        return self.ids.get(name)
+
+    def rebuild(self, objects, id_key='id'):
+        # names needn't be unique (eg. ssh keys, firewalls), first object
+        # listed wins, as it did with a linear search
+        ids = {}
+        for obj in objects:
+            ids.setdefault(obj['name'], obj[id_key])
+        with self.lock:
+            self.ids = ids
+            self.updated_at = time.time()
+
+    def add(self, name, object_id):
+        # a new object is listed after older ones of the same name
+        with self.lock:
+            self.ids.setdefault(name, object_id)
+
+    def discard_id(self, object_id):
+        with self.lock:
+            for name in [name for (name, id) in self.ids.items()
+                         if id == object_id]:
+                del self.ids[name]
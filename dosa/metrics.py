@@ -0,0 +1,122 @@
+"""
+Request instrumentation
+
+    collector = MetricsCollector()
+    client.add_hook('post_request', collector)
+    ...
+    collector.summary()
+    {('GET', 'droplets/{id}'): {'count': 12, 'errors': 0, 'bytes': 18230,
+                                'mean': 0.081, 'p50': 0.075, 'p90': 0.1,
+                                'p99': 0.25}}
+"""
+import bisect
+import re
+import threading
+
+from collections import namedtuple
+
+HOOK_EVENTS = ('pre_request', 'post_request')
+
+# passed to hooks, status_code, bytes and duration are None for
+# pre_request hooks and status_code is None if no response was received
+RequestEvent = namedtuple('RequestEvent', (
+    'method', 'template', 'path', 'status_code', 'bytes', 'duration'))
+
+# numeric ids and uuids in a path
+ID_SEGMENT = re.compile(r'/(\d+|[0-9a-f]{8}-[0-9a-f-]{27})(?=/|$)')
+
+# upper bounds of latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1, 2.5, 5, 10, 30, 60)
+
+
+def path_template(template, formatted, path):
+    """
+    Returns template of `path`, eg. droplets/{id} for droplets/1234
+    @template: template of object's path, eg. domains/{domain}/records
+    @formatted: object's path, eg. domains/example.com/records
+    """
+    if path.startswith(formatted):
+        return template + ID_SEGMENT.sub('/{id}', path[len(formatted):])
+    return ID_SEGMENT.sub('/{id}', path)
+
+
+class Histogram(object):
+    """Latency histogram with fixed buckets"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # last one counts values above largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        """
+        Returns upper bound of the bucket holding `q`th percentile
+        (0 < q <= 100), or largest value seen if it's above all buckets
+        """
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class EndpointStats(object):
+
+    def __init__(self):
+        self.errors = 0
+        self.bytes = 0
+        self.latency = Histogram()
+
+
+class MetricsCollector(object):
+    """
+    post_request hook collecting counts, errors, bytes and latency
+    histogram per (method, path template)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def __call__(self, event):
+        key = (event.method, event.template)
+        with self.lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.latency.add(event.duration)
+            stats.bytes += event.bytes or 0
+            if event.status_code is None or event.status_code >= 400:
+                stats.errors += 1
+
+    def summary(self, percentiles=(50, 90, 99)):
+        with self.lock:
+            summary = {}
+            for key, stats in self.endpoints.items():
+                latency = stats.latency
+                summary[key] = dict(
+                    count=latency.count,
+                    errors=stats.errors,
+                    bytes=stats.bytes,
+                    mean=latency.total / latency.count)
+                for q in percentiles:
+                    summary[key]['p%s' % q] = latency.percentile(q)
+            return summary
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
@@ -0,0 +1,154 @@
+"""
+Compact models of API objects, an opt-in alternative to plain dicts
+
+    for droplet in client.droplets.iter_all(models=True):
+        print(droplet.name, droplet.region.slug, droplet.ip_addresses)
+
+Models keep top level fields in __slots__. Nested objects (eg. droplet's
+region, image, size and networks) are kept as the codec decoded them and
+turned into models on first access.
+"""
+
+
+class Nested(object):
+    """
+    Nested object or list of objects, turned into `model` (a tuple of
+    them for lists) on first access
+    """
+
+    def __init__(self, name, model):
+        self.slot = '_' + name
+        self.model = model
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        # decoded values are models or tuples, never dicts or lists
+        if isinstance(value, dict):
+            value = self.model(value)
+            setattr(obj, self.slot, value)
+        elif isinstance(value, list):
+            value = tuple(self.model(item) for item in value)
+            setattr(obj, self.slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
+
+
+class ModelType(type):
+    """Builds __slots__ of a model from its `fields` and `nested`"""
+
+    def __new__(mcs, name, bases, namespace):
+        fields = tuple(namespace.get('fields', ()))
+        nested = namespace.get('nested', {})
+        namespace['__slots__'] = fields + tuple(
+            '_' + field for field in nested)
+        for field, model in nested.items():
+            namespace[field] = Nested(field, model)
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class Model(object, metaclass=ModelType):
+    """
+    @fields: names of fields copied as is
+    @nested: {field name: model} of fields decoded lazily
+
+    Fields missing in API object are None, fields not declared are
+    dropped.
+    """
+
+    fields = ()
+    nested = {}
+
+    def __init__(self, obj=None, **kw):
+        if kw:
+            obj = dict(obj or {}, **kw)
+        get = (obj or {}).get
+        for field in self.fields:
+            setattr(self, field, get(field))
+        for field in self.nested:
+            setattr(self, '_' + field, get(field))
+
+    def to_dict(self):
+        obj = dict((field, getattr(self, field)) for field in self.fields)
+        for field in self.nested:
+            value = getattr(self, '_' + field)
+            if isinstance(value, Model):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = [item.to_dict() for item in value]
+            obj[field] = value
+        return obj
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        shown = ['%s=%r' % (field, getattr(self, field))
+                 for field in ('id', 'slug', 'name', 'type')
+                 if field in self.fields]
+        return '<%s %s>' % (type(self).__name__, ' '.join(shown))
+
+
+class Region(Model):
+    fields = ('slug', 'name', 'sizes', 'available', 'features')
+
+
+class Size(Model):
+    fields = ('slug', 'memory', 'vcpus', 'disk', 'transfer', 'price_monthly',
+              'price_hourly', 'regions', 'available', 'description')
+
+
+class Image(Model):
+    fields = ('id', 'name', 'type', 'distribution', 'slug', 'public',
+              'regions', 'created_at', 'min_disk_size', 'size_gigabytes',
+              'description', 'tags', 'status', 'error_message')
+
+
+class Network(Model):
+    fields = ('ip_address', 'netmask', 'gateway', 'type')
+
+
+class Networks(Model):
+    nested = {'v4': Network, 'v6': Network}
+
+
+class Droplet(Model):
+    fields = ('id', 'name', 'memory', 'vcpus', 'disk', 'locked', 'status',
+              'created_at', 'features', 'backup_ids', 'snapshot_ids',
+              'volume_ids', 'tags', 'size_slug', 'vpc_uuid', 'kernel',
+              'next_backup_window')
+    nested = {'region': Region, 'image': Image, 'size': Size,
+              'networks': Networks}
+
+    @property
+    def ip_addresses(self):
+        """IPv4 addresses, same as dosa.Droplet.ip_addresses"""
+        if self.networks is None or not self.networks.v4:
+            return []
+        return [net.ip_address for net in self.networks.v4]
+
+
+class FirewallRule(Model):
+    fields = ('protocol', 'ports', 'sources', 'destinations')
+
+
+class Firewall(Model):
+    fields = ('id', 'name', 'status', 'created_at', 'droplet_ids', 'tags',
+              'pending_changes')
+    nested = {'inbound_rules': FirewallRule, 'outbound_rules': FirewallRule}
+
+
+class DomainRecord(Model):
+    fields = ('id', 'type', 'name', 'data', 'priority', 'port', 'ttl',
+              'weight', 'flags', 'tag')
+
+
+class Domain(Model):
+    fields = ('name', 'ttl', 'zone_file')
+
+
+class SSHKey(Model):
+    fields = ('id', 'name', 'fingerprint', 'public_key')
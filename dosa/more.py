@@ -1,23 +1,15 @@
-import glob
+import errno
+import selectors
 import socket
-from os.path import basename
+import time
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 
 def sync_keys(client):
-    local_keys = dict((basename(path), open(path).read())
-                      for path in glob.glob('keys/*'))
-    registered_keys = dict((key['name'], key)
-                           for key in client.keys.list().result['ssh_keys'])
-    local_key_names = set(local_keys.keys())
-    registered_key_names = set(registered_keys.keys())
-    new_key_names = local_key_names.difference(registered_key_names)
-    keynames_to_discard = registered_key_names.difference(local_keys)
-    for name in new_key_names:
-        client.keys.create(name=name, public_key=local_keys[name])
-    for name in keynames_to_discard:
-        client.keys.delete(registered_keys[name]['id'])
-    return {'new': new_key_names, 'deleted': keynames_to_discard,
-            'all_ids': [key['id'] for key in registered_keys.values()]}
+    """sync keys/ directory, see Client.sync_ssh_keys"""
+    return client.sync_ssh_keys('keys')
 
 
 def test_ssh(host, throw=False):
@@ -39,3 +31,206 @@ def test_ssh(host, throw=False):
     finally:
         sock.close()
     return False
+
+
+# a host found reachable by probe_ssh, banner is None unless awaited
+Reachable = namedtuple('Reachable', ('host', 'banner', 'elapsed'))
+
+
+class Probe(object):
+    """State of probe_ssh's attempts on a host"""
+
+    def __init__(self, host, name, port, interval):
+        self.host = host
+        self.name = name
+        self.port = port
+        # (family, sockaddr), None till name is resolved
+        self.address = None
+        self.delay = interval
+        # monotonic time of next attempt
+        self.next_at = 0
+        # set while name is being resolved
+        self.resolving = None
+        # set while an attempt is in progress
+        self.sock = None
+        self.timeout_at = None
+        self.connected = False
+        self.received = b''
+
+
+def resolve(name, port, flags=0):
+    """Returns (family, sockaddr) of first address of `name`"""
+    family, type, proto, canonname, address = socket.getaddrinfo(
+        name, port, type=socket.SOCK_STREAM, flags=flags)[0]
+    return family, address
+
+
+def probe_ssh(hosts, port=22, deadline=300, timeout=3, banner=False,
+              interval=1, max_interval=10, max_concurrent=256,
+              max_resolving=16):
+    """
+    Checks many hosts at once over non-blocking sockets and yields a
+    Reachable for each as soon as it accepts connections (and, with
+    `banner`, sends an SSH banner). Failed hosts, names failing to
+    resolve too (eg. while DNS records of new droplets propagate), are
+    retried after `interval` seconds, doubled on every failure up to
+    `max_interval`. Raises TimeoutError if some hosts are not reachable
+    in `deadline` seconds
+
+    @hosts: ip addresses or names, or (host, port) tuples. Reachable's
+        host is the item of `hosts` it was found for
+    @timeout: seconds an attempt may take
+    @max_concurrent: max number of attempts in progress at once
+    @max_resolving: max number of names resolved at once, in threads
+        as getaddrinfo blocks
+    """
+    started = time.monotonic()
+    deadline_at = started + deadline
+    pending = set()
+    for host in hosts:
+        name, host_port = host if isinstance(host, tuple) else (host, port)
+        probe = Probe(host, name, host_port, interval)
+        try:
+            # ip addresses need no lookup
+            probe.address = resolve(name, host_port, socket.AI_NUMERICHOST)
+        except socket.gaierror:
+            pass
+        pending.add(probe)
+    selector = selectors.DefaultSelector()
+    resolver = None
+    # resolver threads wake the select loop up by writing to it
+    wakeup_r, wakeup_w = socket.socketpair()
+    wakeup_r.setblocking(False)
+    wakeup_w.setblocking(False)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+
+    def wakeup(future):
+        try:
+            wakeup_w.send(b'x')
+        except OSError:
+            # full (loop is awake anyway) or probe_ssh is done
+            pass
+
+    def close(probe):
+        if probe.sock is not None:
+            selector.unregister(probe.sock)
+            probe.sock.close()
+            probe.sock = None
+
+    def fail(probe, now):
+        close(probe)
+        probe.next_at = now + probe.delay
+        probe.delay = min(probe.delay * 2, max_interval)
+
+    def start(probe, now):
+        nonlocal resolver
+        if probe.address is None:
+            if resolver is None:
+                resolver = ThreadPoolExecutor(max_workers=max_resolving)
+            probe.resolving = resolver.submit(
+                resolve, probe.name, probe.port)
+            probe.resolving.add_done_callback(wakeup)
+            return
+        family, address = probe.address
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        err = sock.connect_ex(address)
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            fail(probe, now)
+            return
+        probe.sock = sock
+        probe.timeout_at = now + timeout
+        probe.connected = False
+        probe.received = b''
+        selector.register(sock, selectors.EVENT_WRITE, probe)
+
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at:
+                raise TimeoutError('Hosts not reachable in %ss: %s' % (
+                    deadline, ', '.join(sorted(
+                        str(probe.host) for probe in pending))))
+            for probe in [probe for probe in pending if probe.sock]:
+                if probe.timeout_at <= now:
+                    fail(probe, now)
+            for probe in [probe for probe in pending
+                          if probe.resolving and probe.resolving.done()]:
+                try:
+                    probe.address = probe.resolving.result()
+                except OSError:
+                    # gaierror, retried like a refused connection
+                    fail(probe, now)
+                probe.resolving = None
+            idle = sorted((probe for probe in pending
+                           if not probe.sock and not probe.resolving),
+                          key=lambda probe: probe.next_at)
+            # wakeup socket is registered too
+            slots = max_concurrent - len(selector.get_map()) + 1
+            for probe in idle:
+                if slots <= 0 or probe.next_at > now:
+                    break
+                start(probe, now)
+                if probe.sock is not None:
+                    slots -= 1
+
+            # sleep till next event, attempt timeout, attempt, resolved
+            # name or deadline. with no free slot, attempts wait for one
+            # to be done
+            wake_at = min([deadline_at] + [
+                probe.timeout_at for probe in pending if probe.sock] + [
+                probe.next_at for probe in idle
+                if slots > 0 and not probe.sock and not probe.resolving])
+            events = selector.select(max(wake_at - now, 0))
+            now = time.monotonic()
+            for key, mask in events:
+                probe = key.data
+                if probe is None:
+                    try:
+                        wakeup_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                if not probe.connected:
+                    err = probe.sock.getsockopt(
+                        socket.SOL_SOCKET, socket.SO_ERROR)
+                    if err:
+                        fail(probe, now)
+                        continue
+                    probe.connected = True
+                    if banner:
+                        selector.modify(
+                            probe.sock, selectors.EVENT_READ, probe)
+                        continue
+                    line = None
+                else:
+                    try:
+                        data = probe.sock.recv(256)
+                    except OSError:
+                        data = b''
+                    probe.received += data
+                    if b'\n' not in probe.received:
+                        # sshd sends its banner in one go
+                        if not data or len(probe.received) > 255:
+                            fail(probe, now)
+                        continue
+                    line = probe.received.split(b'\n', 1)[0].strip()
+                    if not line.startswith(b'SSH-'):
+                        fail(probe, now)
+                        continue
+                    line = line.decode('ascii', 'replace')
+                close(probe)
+                pending.discard(probe)
+                yield Reachable(probe.host, line, now - started)
+    finally:
+        for probe in pending:
+            close(probe)
+            if probe.resolving:
+                probe.resolving.cancel()
+        if resolver is not None:
+            # lookups in progress are left to finish in background
+            resolver.shutdown(wait=False)
+        selector.close()
+        wakeup_r.close()
+        wakeup_w.close()
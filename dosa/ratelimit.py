@@ -0,0 +1,106 @@
+"""
+Client side pacing of requests against the API rate limit
+"""
+import threading
+import time
+
+from collections import namedtuple
+
+RateBudget = namedtuple('RateBudget', ('limit', 'remaining', 'reset'))
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Governor(object):
+    """
+    Tracks rate limit budget of an API token from RateLimit-* response
+    headers. Requests go through untouched while budget is plenty, once
+    remaining budget falls below `low_water` fraction of the limit, rest
+    of it is handed out evenly till reset time, so that callers slow down
+    instead of running into 429s.
+
+    Thread safe, meant to be shared by everything using the same token.
+    """
+
+    def __init__(self, low_water=0.1):
+        self.low_water = low_water
+        self.lock = threading.Lock()
+        self.limit = None
+        self.remaining = None
+        # epoch seconds at which budget is refilled
+        self.reset = None
+        # time.time() at which next paced request may be sent
+        self.next_slot = 0
+
+    @property
+    def budget(self):
+        return RateBudget(self.limit, self.remaining, self.reset)
+
+    def acquire(self):
+        """Blocks till a request may be sent"""
+        delay = self.take()
+        if delay > 0:
+            time.sleep(delay)
+
+    def take(self):
+        """
+        Takes one request out of budget, returns seconds to wait before
+        sending it, for callers which can't block (eg. asyncio)
+        """
+        with self.lock:
+            return self.reserve(time.time())
+
+    def reserve(self, now):
+        """Takes one request out of budget, returns seconds to wait"""
+        if self.remaining is None or self.limit is None:
+            return 0
+        if self.reset is None or now >= self.reset:
+            # window is over, server will tell about the new one
+            self.remaining = None
+            return 0
+        if self.remaining > self.limit * self.low_water:
+            self.remaining -= 1
+            return 0
+        if self.remaining <= 0:
+            # nothing left, wait for the window to be over
+            self.next_slot = max(self.next_slot, self.reset)
+            return self.next_slot - now
+        interval = (self.reset - now) / max(self.remaining, 1)
+        slot = max(self.next_slot, now)
+        self.next_slot = slot + interval
+        self.remaining -= 1
+        return slot - now
+
+    def update(self, headers):
+        """Updates budget from response headers"""
+        limit = parse_int(headers.get('RateLimit-Limit'))
+        remaining = parse_int(headers.get('RateLimit-Remaining'))
+        reset = parse_int(headers.get('RateLimit-Reset'))
+        if limit is None or remaining is None:
+            return
+        with self.lock:
+            # responses of concurrent requests may come in any order, in
+            # the same window the lowest remaining is the latest one
+            if (reset == self.reset and self.remaining is not None and
+                    self.remaining < remaining):
+                remaining = self.remaining
+            self.limit = limit
+            self.remaining = remaining
+            self.reset = reset
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(api_key):
+    """Returns the Governor shared by all users of `api_key`"""
+    with _governors_lock:
+        if api_key not in _governors:
+            _governors[api_key] = Governor()
+        return _governors[api_key]
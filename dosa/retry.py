@@ -0,0 +1,75 @@
+"""
+Retry policy for failed requests
+"""
+import random
+import time
+
+# requests which can be repeated without changing outcome
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'DELETE')
+# 429 is rejected before being processed, so it is safe to retry any
+# request on it
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def parse_retry_after(value):
+    """Returns seconds to wait from a Retry-After header value"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except (TypeError, ValueError):
+        pass
+    # HTTP date, rarely sent, its parser is costly to import
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy(object):
+    """
+    Retries requests failed because of rate limit (429), server errors
+    (5xx) or connection failures, with exponential backoff and full
+    jitter, honoring Retry-After when the API sends it.
+
+    Non idempotent requests (POST) are retried only when API surely did
+    not act upon them: on 429, or when connection could not be made.
+
+    @retries: max number of retries, 0 disables retrying
+    @backoff: base delay in seconds, doubled on every retry
+    @max_backoff: max delay in seconds
+    @retry_post: retry POSTs on server and connection errors too, only
+        when such requests are known to be safe to repeat
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30,
+                 retry_post=False):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_post = retry_post
+
+    def should_retry(self, method, attempt, status_code=None, sent=True):
+        """
+        @attempt: number of retries done so far
+        @status_code: status of failed response, None on connection error
+        @sent: False if request surely did not reach the API
+        """
+        if attempt >= self.retries:
+            return False
+        if status_code == 429 or not sent:
+            return True
+        if status_code is not None and status_code not in RETRY_STATUSES:
+            return False
+        return method in IDEMPOTENT_METHODS or self.retry_post
+
+    def delay(self, attempt, retry_after=None):
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def wait(self, attempt, retry_after=None):
+        time.sleep(self.delay(attempt, retry_after))
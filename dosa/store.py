@@ -0,0 +1,235 @@
+"""
+On disk inventory of an account's droplets, images, keys, domains and
+firewalls, in a SQLite database several processes can share
+
+    store = InventoryStore('~/.cache/dosa/inventory.db')
+    droplets = store.load(client.droplets, max_age=300)
+    store.find('droplets', region='nyc1', status='active')
+    store.get('images', 1234)
+    store.find('keys', name='deploy')
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dosa.index import fingerprint
+
+SCHEMA_VERSION = 1
+# collections of a Client kept by refresh_client
+STORED_COLLECTIONS = ('droplets', 'images', 'keys', 'domains', 'firewalls')
+# Client attribute -> name collection is stored under, where they differ
+COLLECTION_NAMES = {'keys': 'ssh_keys'}
+# columns objects can be looked up by with find
+INDEXED_COLUMNS = ('name', 'slug', 'status', 'region')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    slug TEXT,
+    status TEXT,
+    region TEXT,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (collection, name);
+CREATE INDEX IF NOT EXISTS objects_slug ON objects (collection, slug);
+CREATE INDEX IF NOT EXISTS objects_status ON objects (collection, status);
+CREATE INDEX IF NOT EXISTS objects_region ON objects (collection, region);
+CREATE TABLE IF NOT EXISTS refreshes (
+    collection TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+def collection_name(collection):
+    """
+    Name of a Collection object, or of a Collection given by its name or
+    its Client attribute name, eg. 'keys' -> 'ssh_keys'
+    """
+    if isinstance(collection, str):
+        return COLLECTION_NAMES.get(collection, collection)
+    return collection.name
+
+
+def object_region(obj):
+    # droplets have {'region': {'slug': 'nyc1', ...}}
+    region = obj.get('region')
+    if isinstance(region, dict):
+        return region.get('slug')
+    return region
+
+
+class InventoryStore(object):
+    """
+    Objects of collections with their indexed columns. A refresh writes
+    only rows whose content changed and deletes rows of objects gone, in
+    a single transaction; readers (other processes too, thanks to WAL
+    mode) see either the previous or the new inventory.
+
+    @path: database file, ':memory:' for a private in memory store
+    @timeout: seconds to wait for another process' write to finish
+    """
+
+    def __init__(self, path, timeout=30):
+        if path != ':memory:':
+            path = os.path.expanduser(path)
+            dirname = os.path.dirname(path)
+            if dirname and not os.path.exists(dirname):
+                os.makedirs(dirname)
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=timeout,
+                                  check_same_thread=False,
+                                  isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.lock:
+            version = self.db.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.db.executescript(
+                    'DROP TABLE IF EXISTS objects;'
+                    'DROP TABLE IF EXISTS refreshes;')
+            self.db.executescript(SCHEMA)
+            self.db.execute('PRAGMA user_version=%d' % SCHEMA_VERSION)
+
+    def refreshed_at(self, collection):
+        """time.time() of last refresh of `collection`, None if never"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT refreshed_at FROM refreshes WHERE collection = ?',
+                (collection_name(collection),)).fetchone()
+        return row and row[0]
+
+    def is_stale(self, collection, max_age):
+        refreshed_at = self.refreshed_at(collection)
+        return refreshed_at is None or (
+            max_age is not None and time.time() - refreshed_at > max_age)
+
+    def refresh(self, collection):
+        """
+        Updates store from a full listing of `collection` (a dosa
+        Collection). Returns number of objects written or deleted
+        """
+        # fetch before locking, readers go on meanwhile
+        objects = list(collection.iter_all())
+        return self.update(collection, objects)
+
+    def update(self, collection, objects):
+        name = collection_name(collection)
+        id_key = getattr(collection, 'id_key', 'id')
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                hashes = dict(self.db.execute(
+                    'SELECT id, hash FROM objects WHERE collection = ?',
+                    (name,)))
+                rows = []
+                moved = []
+                for position, obj in enumerate(objects):
+                    obj_id = str(obj[id_key])
+                    obj_hash = fingerprint(obj)
+                    if hashes.pop(obj_id, None) == obj_hash:
+                        moved.append((position, name, obj_id))
+                        continue
+                    rows.append((
+                        name, obj_id, position, obj.get('name'),
+                        obj.get('slug'), obj.get('status'),
+                        object_region(obj), obj_hash, json.dumps(obj)))
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO objects VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                # unchanged rows only get their listing position updated
+                self.db.executemany(
+                    'UPDATE objects SET position = ? '
+                    'WHERE collection = ? AND id = ? AND position != ?',
+                    [row + (row[0],) for row in moved])
+                self.db.executemany(
+                    'DELETE FROM objects WHERE collection = ? AND id = ?',
+                    [(name, obj_id) for obj_id in hashes])
+                self.db.execute(
+                    'INSERT OR REPLACE INTO refreshes VALUES (?, ?)',
+                    (name, time.time()))
+                self.db.execute('COMMIT')
+            except BaseException:
+                self.db.execute('ROLLBACK')
+                raise
+        return len(rows) + len(hashes)
+
+    def refresh_client(self, client, collections=STORED_COLLECTIONS,
+                       max_age=None, max_workers=None):
+        """
+        Refreshes stale `collections` (attribute names of `client`)
+        concurrently. Returns {attribute name: number of objects written
+        or deleted}
+        """
+        stale = [attr for attr in collections
+                 if self.is_stale(getattr(client, attr), max_age)]
+        if not stale:
+            return {}
+        max_workers = max_workers or client.session.max_workers
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            changes = executor.map(
+                self.refresh, [getattr(client, attr) for attr in stale])
+            return dict(zip(stale, changes))
+
+    def load(self, collection, max_age=None):
+        """
+        Returns all objects of `collection` in listing order, refreshed
+        first if never refreshed or refreshed over `max_age` seconds ago
+        """
+        if self.is_stale(collection, max_age):
+            self.refresh(collection)
+        return self.find(collection)
+
+    def find(self, collection, **filters):
+        """
+        Returns objects of `collection` (a Collection or its name) in
+        listing order, matching all `filters` on INDEXED_COLUMNS, eg.
+        find('droplets', region='nyc1', status='active')
+        """
+        unknown = set(filters) - set(INDEXED_COLUMNS)
+        if unknown:
+            raise ValueError('Not indexed: %s' % ', '.join(sorted(unknown)))
+        name = collection_name(collection)
+        query = 'SELECT data FROM objects WHERE collection = ?'
+        args = [name]
+        for column, value in sorted(filters.items()):
+            query += ' AND %s = ?' % column
+            args.append(value)
+        query += ' ORDER BY position'
+        with self.lock:
+            self.check_stored(name)
+            rows = self.db.execute(query, args).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, collection, object_id):
+        """Returns object of `collection` by id, None if not in store"""
+        name = collection_name(collection)
+        with self.lock:
+            self.check_stored(name)
+            row = self.db.execute(
+                'SELECT data FROM objects WHERE collection = ? AND id = ?',
+                (name, str(object_id))).fetchone()
+        return row and json.loads(row[0])
+
+    def check_stored(self, name):
+        """
+        Raises ValueError if collection `name` was never refreshed, so
+        that a misspelt name doesn't pass for an empty collection
+        """
+        if self.db.execute('SELECT 1 FROM refreshes WHERE collection = ?',
+                           (name,)).fetchone() is None:
+            raise ValueError('Collection %s is not in store' % name)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
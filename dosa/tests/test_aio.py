@@ -0,0 +1,111 @@
+import json
+import os.path
+from unittest import IsolatedAsyncioTestCase, skipIf
+from unittest.mock import AsyncMock, patch
+
+import dosa
+from dosa import aio
+
+endpoint = 'https://api.digitalocean.com/%s' % dosa.API_VERSION
+api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
+
+
+@skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+class TestDosaAsyncClient(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.api_key = 'my_fake_api_key'
+        self.client = aio.AsyncClient(self.api_key)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    @patch('dosa.aio.AsyncSession.request')
+    async def test_droplet_list(self, mock_request):
+        mock_request.return_value = (200, self._get_sample_data('droplets'))
+        status, result = await self.client.droplets.list()
+        self.assertEqual(1, len(result['droplets']))
+        req_type, url, params, data = mock_request.call_args[0]
+        self.assertEqual(req_type, 'GET')
+        self.assertEqual(url, '{}/droplets'.format(endpoint))
+        self.assertIsNone(data)
+
+    @patch('dosa.aio.AsyncSession.request')
+    async def test_droplet_status(self, mock_request):
+        mock_request.return_value = (
+            200, self._get_sample_data('droplet_by_id'))
+        data_sample = json.loads(self._get_sample_data('droplet_by_id'))
+        droplet = self.client.Droplet(data_sample['droplet']['id'])
+        self.assertEqual(data_sample['droplet']['status'],
+                         await droplet.status())
+
+    @patch('dosa.aio.AsyncSession.request')
+    async def test_all_pages_in_order(self, mock_request):
+        async def fake_request(req_type, url, params, data):
+            page = params.get('page', 1)
+            return 200, json.dumps({
+                'images': [{'id': page * 10 + i} for i in range(2)],
+                'meta': {'total': 6}}).encode()
+
+        mock_request.side_effect = fake_request
+        images = await self.client.images.all(per_page=2)
+        self.assertEqual([image['id'] for image in images],
+                         [10, 11, 20, 21, 30, 31])
+
+    @patch('dosa.aio.AsyncSession.request')
+    async def test_image_search(self, mock_request):
+        mock_request.return_value = (
+            200, self._get_sample_data('images_search'))
+        images = await self.client.images.search('ubuntu')
+        self.assertEqual(1, len(images))
+
+    @patch('dosa.aio.AsyncSession.request')
+    async def test_request_failed(self, mock_request):
+        mock_request.return_value = (404, b'{"id": "not_found"}')
+        with self.assertRaises(dosa.NotFoundError) as cm:
+            await self.client.Droplet(1).info()
+        self.assertEqual(cm.exception.status_code, 404)
+
+    @patch('dosa.aio.asyncio.sleep', new_callable=AsyncMock)
+    @patch('dosa.aio.AsyncSession.send')
+    async def test_retried(self, mock_send, mock_sleep):
+        mock_send.side_effect = [
+            (503, {}, b'{"id": "unavailable"}'),
+            (429, {'Retry-After': '3'}, b'{"id": "too_many_requests"}'),
+            (200, {}, self._get_sample_data('droplets'))]
+        status, result = await self.client.droplets.list()
+        self.assertEqual(status, 200)
+        self.assertEqual(mock_send.call_count, 3)
+        self.assertEqual(mock_sleep.call_args[0][0], 3)
+
+    @patch('dosa.aio.asyncio.sleep', new_callable=AsyncMock)
+    @patch('dosa.aio.AsyncSession.send')
+    async def test_post_not_retried_on_server_error(self, mock_send,
+                                                    mock_sleep):
+        mock_send.return_value = (500, {}, b'{"id": "error"}')
+        with self.assertRaises(dosa.ServerError):
+            await self.client.keys.create(name='key', public_key='ssh-rsa')
+        self.assertEqual(mock_send.call_count, 1)
+
+    @patch('dosa.aio.asyncio.sleep', new_callable=AsyncMock)
+    @patch('dosa.aio.AsyncSession.send')
+    async def test_connection_error(self, mock_send, mock_sleep):
+        mock_send.side_effect = aio.aiohttp.ServerDisconnectedError()
+        with self.assertRaises(dosa.APIConnectionError):
+            await self.client.droplets.list()
+        self.assertEqual(mock_send.call_count, 4)
+
+    @patch('dosa.aio.AsyncSession.send')
+    async def test_api_url_and_governor(self, mock_send):
+        mock_send.return_value = (200, {}, self._get_sample_data('droplets'))
+        client = aio.AsyncClient(self.api_key, api_url='http://127.0.0.1:1')
+        await client.droplets.list()
+        self.assertEqual(mock_send.call_args[0][1],
+                         'http://127.0.0.1:1/%s/droplets' % dosa.API_VERSION)
+        # rate limit budget is shared with sync clients of the token
+        self.assertIs(client.session.governor,
+                      dosa.Client(self.api_key).session.governor)
+        await client.close()
+
+    def _get_sample_data(self, path=''):
+        return open(os.path.join(api_sample_data,
+                                 '{}.json'.format(path)), 'rb').read()
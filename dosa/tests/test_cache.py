@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+import dosa
+from dosa.cache import LRUCache, ResponseCache, SingleFlight
+from dosa.transport import MemoryTransport
+
+
+class TestLRUCache(TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+
+class TestResponseCache(TestCase):
+    @patch('dosa.cache.time.monotonic')
+    def test_expires(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        cache = ResponseCache()
+        cache.set('sizes', {}, 10, 'sizes list')
+        self.assertEqual(cache.get('sizes', {}), 'sizes list')
+        self.assertIsNone(cache.get('sizes', {'page': 2}))
+        mock_monotonic.return_value = 111
+        self.assertIsNone(cache.get('sizes', {}))
+
+    def test_invalidate_related_paths(self):
+        cache = ResponseCache()
+        cache.set('droplets', {}, 10, 'list')
+        cache.set('droplets/1', {}, 10, 'droplet')
+        cache.set('droplets_x', {}, 10, 'other')
+        cache.invalidate('droplets/1/actions')
+        self.assertIsNone(cache.get('droplets', {}))
+        self.assertIsNone(cache.get('droplets/1', {}))
+        self.assertEqual(cache.get('droplets_x', {}), 'other')
+
+    def test_set_after_invalidate_dropped(self):
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate('images/1')
+        self.assertFalse(cache.set('images', {}, 10, 'old', generation))
+        self.assertIsNone(cache.get('images', {}))
+        self.assertTrue(cache.set('images', {}, 10, 'new',
+                                  cache.generation))
+
+
+class TestSingleFlight(TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, value):
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_concurrently(self, value, callers=4):
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            futures = [executor.submit(self.flight.do, 'key', self.slow,
+                                       value) for i in range(callers)]
+            # let the others join the first call
+            time.sleep(0.1)
+            self.release.set()
+        return futures
+
+    def test_shared_result(self):
+        futures = self.run_concurrently({'droplet': {}})
+        results = [future.result() for future in futures]
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(len(self.flight), 0)
+
+    def test_shared_error(self):
+        futures = self.run_concurrently(ValueError('boom'))
+        for future in futures:
+            self.assertIsInstance(future.exception(), ValueError)
+        self.assertEqual(self.calls, 1)
+        # failed calls are not remembered
+        self.assertEqual(self.flight.do('key', lambda: 1), 1)
+
+
+class TestClientCacheConsistency(TestCase):
+    def setUp(self):
+        self.transport = MemoryTransport()
+        self.client = dosa.Client('my_fake_api_key',
+                                  transport=self.transport)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def slow_listing(self, params):
+        self.started.set()
+        self.release.wait(5)
+        return {'images': [{'id': 1}], 'meta': {'total': 1}}
+
+    def test_listing_in_flight_during_delete_not_cached(self):
+        self.transport.add('GET', 'images', self.slow_listing)
+        self.transport.add('DELETE', 'images/1', status_code=204)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            listing = executor.submit(self.client.images.list)
+            self.started.wait(5)
+            self.client.images.delete(1)
+            self.release.set()
+            listing.result()
+        self.client.images.list()
+        gets = [r for r in self.transport.requests if r[0] == 'GET']
+        self.assertEqual(len(gets), 2)
+
+    def test_read_after_write_not_coalesced(self):
+        def slow_firewall(params):
+            self.started.set()
+            self.release.wait(5)
+            return {'firewall': {'id': 'f1', 'droplet_ids': []}}
+
+        self.transport.add('GET', 'firewalls/f1', slow_firewall)
+        self.transport.add('GET', 'firewalls/f1',
+                           {'firewall': {'id': 'f1', 'droplet_ids': [7]}})
+        self.transport.add('POST', 'firewalls/f1/droplets', status_code=204)
+        firewall = dosa.Firewall(self.client.api_key, 'firewalls/{id}',
+                                 id='f1', session=self.client.session)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # another caller's GET, sent before the write
+            stale = executor.submit(firewall.droplet_ids)
+            self.started.wait(5)
+            firewall.add_droplets([7], current_ids=[])
+            fresh = executor.submit(firewall.droplet_ids)
+            try:
+                self.assertEqual(fresh.result(timeout=2), [7])
+            finally:
+                self.release.set()
+            self.assertEqual(stale.result(), [])
@@ -0,0 +1,214 @@
+import json
+import os.path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import dosa
+
+endpoint = 'https://api.digitalocean.com/%s' % dosa.API_VERSION
+api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
+
+
+class TestDosaClientSession(TestCase):
+    def setUp(self):
+        self.api_key = 'my_fake_api_key'
+        self.client = dosa.Client(self.api_key, pool_size=4)
+
+    def test_children_share_session(self):
+        session = self.client.session
+        self.assertEqual(session.pool_size, 4)
+        self.assertIs(self.client.droplets.session, session)
+        self.assertIs(self.client.droplets.sizes.session, session)
+        self.assertIs(self.client.Droplet(1).session, session)
+        records = self.client.DomainRecords('example.com')
+        self.assertIs(records.Record(1).session, session)
+
+    def test_standalone_object_session(self):
+        firewall = dosa.Firewall(self.api_key, 'firewalls/{id}', id='x')
+        self.assertIs(firewall.session, dosa.get_session(self.api_key))
+
+    @patch('requests.Session.get')
+    def test_headers_built_once(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('droplets')
+        self.client.droplets.list()
+        self.client.images.list()
+        first, second = mock_get.call_args_list
+        self.assertIs(first[1]['headers'], second[1]['headers'])
+
+    @patch('requests.Session.get')
+    def test_api_url(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = json.dumps({'sizes': []}).encode()
+        client = dosa.Client(self.api_key, api_url='http://127.0.0.1:8080')
+        client.sizes.list()
+        self.assertEqual(mock_get.call_args[0][0],
+                         'http://127.0.0.1:8080/%s/sizes' % dosa.API_VERSION)
+
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_sizes_cached(self, mock_get, mock_post):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('sizes')
+        mock_post.return_value.status_code = 202
+        mock_post.return_value.content = self._get_sample_data(
+            'droplet_create')
+        for name in ('one', 'two'):
+            self.client.droplets.create(
+                name=name, region='nyc2', size='512mb',
+                image='ubuntu-14-04-x32')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_post.call_count, 2)
+
+        self.client.invalidate('sizes')
+        self.client.sizes.list()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.delete')
+    @patch('requests.Session.get')
+    def test_cache_invalidated_by_mutation(self, mock_get, mock_delete):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('keys')
+        mock_delete.return_value.status_code = 204
+        mock_delete.return_value.content = b''
+        client = dosa.Client(self.api_key, cache_ttls={'ssh_keys': 60})
+        client.keys.list()
+        client.keys.list()
+        self.assertEqual(mock_get.call_count, 1)
+
+        client.keys.delete(512189)
+        client.keys.list()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_resources_not_cached(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('droplets')
+        self.client.droplets.list()
+        self.client.droplets.list()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_conditional_get(self, mock_get):
+        droplet_data = json.loads(self._get_sample_data('droplet_by_id'))
+        modified = MagicMock(status_code=200, headers={'ETag': '"v1"'})
+        modified.content = json.dumps(droplet_data).encode()
+        not_modified = MagicMock(status_code=304, headers={}, text='')
+        mock_get.side_effect = [modified, not_modified]
+        droplet = self.client.Droplet(droplet_data['droplet']['id'])
+
+        first = droplet.info()
+        self.assertNotIn('If-None-Match', mock_get.call_args[1]['headers'])
+        second = droplet.info()
+        self.assertEqual(
+            mock_get.call_args[1]['headers']['If-None-Match'], '"v1"')
+        self.assertEqual(second, first)
+        self.assertEqual(second.status_code, 200)
+
+    @patch('requests.Session.get')
+    def test_conditional_get_evicted(self, mock_get):
+        droplet_data = json.loads(self._get_sample_data('droplet_by_id'))
+        modified = MagicMock(status_code=200, headers={'ETag': '"v1"'})
+        modified.content = json.dumps(droplet_data).encode()
+        responses = [modified, None, modified]
+
+        def get(url, params, data, headers):
+            resp = responses.pop(0)
+            if resp is None:
+                # stored result is evicted once headers were built
+                self.client.session.validators.entries.clear()
+                resp = MagicMock(status_code=304, headers={}, text='')
+            return resp
+
+        mock_get.side_effect = get
+        droplet = self.client.Droplet(droplet_data['droplet']['id'])
+        first = droplet.info()
+        second = droplet.info()
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertNotIn('If-None-Match', mock_get.call_args[1]['headers'])
+        self.assertEqual(second, first)
+
+    def test_identical_gets_coalesced(self):
+        transport = dosa.transport.MemoryTransport()
+        release = threading.Event()
+
+        def droplet(params):
+            release.wait(5)
+            return {'droplet': {'id': 1, 'status': 'active',
+                                'networks': {'v4': []}}}
+
+        transport.add('GET', 'droplets/1', droplet)
+        client = dosa.Client(self.api_key, transport=transport)
+        droplet = client.Droplet(1)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(droplet.status),
+                       executor.submit(droplet.ip_addresses),
+                       executor.submit(client.Droplet(1).info),
+                       executor.submit(droplet.status)]
+            time.sleep(0.1)
+            release.set()
+        self.assertEqual(futures[0].result(), 'active')
+        self.assertEqual(futures[1].result(), [])
+        self.assertEqual(len(transport.requests), 1)
+
+    @patch('requests.Session.get')
+    def test_rate_limit_shared_per_token(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {
+            'RateLimit-Limit': '5000',
+            'RateLimit-Remaining': '4321',
+            'RateLimit-Reset': '4102444800'}
+        mock_get.return_value.content = self._get_sample_data('droplets')
+        client = dosa.Client('rate_limited_api_key')
+        client.droplets.list()
+        other_client = dosa.Client('rate_limited_api_key')
+        self.assertEqual(other_client.rate_limit,
+                         (5000, 4321, 4102444800))
+
+    def _get_sample_data(self, path=''):
+        return open(os.path.join(api_sample_data,
+                                 '{}.json'.format(path)), 'rb').read()
+
+
+class TestClientPool(TestCase):
+    def setUp(self):
+        self.pool = dosa.ClientPool(
+            {'team-a': 'api_key_a', 'team-b': 'api_key_b'},
+            transport='memory')
+        for account, client in self.pool.clients.items():
+            client.session.transport.add('GET', 'droplets', {
+                'droplets': [{'id': 1, 'name': account + '-web'},
+                             {'id': 2, 'name': account + '-db'}],
+                'links': {}, 'meta': {'total': 2}})
+
+    def test_accounts_have_own_clients(self):
+        client_a = self.pool.clients['team-a']
+        client_b = self.pool.clients['team-b']
+        self.assertIsNot(client_a.session, client_b.session)
+        self.assertIsNot(client_a.session.governor,
+                         client_b.session.governor)
+
+    def test_all_tagged_by_account(self):
+        droplets = self.pool.all('droplets')
+        self.assertEqual(
+            [(account, droplet['name']) for account, droplet in droplets],
+            [('team-a', 'team-a-web'), ('team-a', 'team-a-db'),
+             ('team-b', 'team-b-web'), ('team-b', 'team-b-db')])
+        self.assertEqual(
+            len(self.pool.all('droplets', accounts=['team-b'])), 2)
+
+    def test_errors(self):
+        # no images served, 404 for every account
+        with self.assertRaises(dosa.NotFoundError):
+            self.pool.search_images('ubuntu')
+        results = self.pool.map(lambda client: client.droplets.all(),
+                                return_exceptions=True)
+        self.assertEqual(len(results['team-a']), 2)
+        self.pool.clients['team-b'].session.transport.responses.clear()
+        results = self.pool.map(lambda client: client.droplets.all(),
+                                return_exceptions=True)
+        self.assertIsInstance(results['team-b'], dosa.NotFoundError)
@@ -0,0 +1,64 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+import dosa
+from dosa.codec import JSONCodec, OrjsonCodec, default_codec, orjson
+
+
+class TestCodec(TestCase):
+    def test_round_trip(self):
+        obj = {'droplets': [{'id': 1, 'name': 'dösa'}], 'meta': None}
+        codecs = [JSONCodec()]
+        if orjson is not None:
+            codecs.append(OrjsonCodec())
+        for codec in codecs:
+            encoded = codec.dumps(obj)
+            if isinstance(encoded, str):
+                encoded = encoded.encode('utf-8')
+            self.assertEqual(codec.loads(encoded), obj)
+            with self.assertRaises(ValueError):
+                codec.loads(b'<html>bad gateway</html>')
+
+    @patch('dosa.codec.orjson', None)
+    def test_default_without_orjson(self):
+        self.assertIsInstance(default_codec(), JSONCodec)
+        with self.assertRaises(ImportError):
+            OrjsonCodec()
+
+
+class TestClientCodec(TestCase):
+    def setUp(self):
+        self.client = dosa.Client('my_fake_api_key', codec=JSONCodec())
+
+    @patch('requests.Session.post')
+    @patch('requests.Session.get')
+    def test_bodies(self, mock_get, mock_post):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = b'{"domains": []}'
+        mock_post.return_value.status_code = 201
+        mock_post.return_value.content = b'{"domain": {"name": "a.com"}}'
+
+        status, result = self.client.domains.list()
+        self.assertEqual(result, {'domains': []})
+        # nothing is encoded for requests without a payload
+        self.assertIsNone(mock_get.call_args[1]['data'])
+        # responses are parsed from bytes, never via .json()
+        self.assertFalse(mock_get.return_value.json.called)
+
+        status, result = self.client.domains.create(name='a.com')
+        self.assertEqual(result['domain']['name'], 'a.com')
+        self.assertEqual(json.loads(mock_post.call_args[1]['data']),
+                         {'name': 'a.com'})
+
+    @patch('dosa.retry.time.sleep')
+    @patch('requests.Session.get')
+    def test_failed_non_json_body(self, mock_get, mock_sleep):
+        mock_get.return_value.status_code = 502
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = b'<html>bad gateway</html>'
+        mock_get.return_value.text = '<html>bad gateway</html>'
+        with self.assertRaises(dosa.ServerError) as cm:
+            self.client.Droplet(1).info()
+        self.assertEqual(cm.exception.body, '<html>bad gateway</html>')
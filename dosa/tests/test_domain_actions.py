@@ -11,11 +11,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientDomainActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -23,19 +22,17 @@ class TestDosaClientDomainActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_domain_list(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('domains'))
+        mock_get.return_value.content = self._get_sample_data('domains')
         status, result = self.client.domains.list()
         self.assertEqual(1, len(result['domains']))
         self.assertTrue(mock_get.called)
@@ -45,14 +42,14 @@ class TestDosaClientDomainActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/domains'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.post')
+    @patch('requests.Session.post')
     def test_dosa_domain_create(self, mock_post):
         mock_post.return_value.status_code = 202
         mocked_return = {
@@ -62,7 +59,7 @@ class TestDosaClientDomainActions(TestCase):
                 'zone_file': 'null'
             }
         }
-        mock_post.return_value.json.return_value = mocked_return
+        mock_post.return_value.content = json.dumps(mocked_return).encode()
         status, result = self.client.domains.create(
             name='example.com', ip_address='1.2.3.4')
         self.assertTrue(mock_post.called)
@@ -79,11 +76,11 @@ class TestDosaClientDomainActions(TestCase):
         data_json = json.loads(data['data'])
         self.assertEqual(data_json['name'], mocked_return['domain']['name'])
 
-    @patch('dosa.requests.delete')
+    @patch('requests.Session.delete')
     def test_dosa_domain_delete(self, mock_delete):
         mock_delete.return_value.status_code = 204
         # there's no response for delete domain (No Content)
-        mock_delete.return_value.text = None
+        mock_delete.return_value.content = b''
         domain_name = 'example.com'
         status, result = self.client.domains.delete(domain_name)
 
@@ -103,4 +100,4 @@ class TestDosaClientDomainActions(TestCase):
 
     def _get_sample_data(self, path=''):
         return open(os.path.join(api_sample_data,
-                                 '{}.json'.format(path))).read()
+                                 '{}.json'.format(path)), 'rb').read()
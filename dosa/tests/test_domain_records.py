@@ -11,11 +11,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientDomainRecordActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -23,19 +22,17 @@ class TestDosaClientDomainRecordActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_get_domain_record(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('domain_record'))
+        mock_get.return_value.content = self._get_sample_data('domain_record')
         domain_name = 'example.com'
         dr = self.client.DomainRecords(domain=domain_name)
         dr.list()
@@ -46,7 +43,7 @@ class TestDosaClientDomainRecordActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(
             url[0], '{}/domains/{}/records'.format(endpoint, domain_name))
@@ -54,11 +51,11 @@ class TestDosaClientDomainRecordActions(TestCase):
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.post')
+    @patch('requests.Session.post')
     def test_dosa_domain_record_create(self, mock_post):
         mock_post.return_value.status_code = 201
         mocked_return = json.loads(self._get_sample_data('domain_record'))
-        mock_post.return_value.json.return_value = mocked_return
+        mock_post.return_value.content = json.dumps(mocked_return).encode()
         domain_name = 'example.com'
         dr = self.client.DomainRecords(domain=domain_name)
         dr.create(type='A', name=domain_name, data='162.10.66.0')
@@ -79,11 +76,10 @@ class TestDosaClientDomainRecordActions(TestCase):
             data_dict['data'],
             mocked_return['domain_record']['data'])
 
-    @patch('dosa.requests.put')
+    @patch('requests.Session.put')
     def test_dosa_update_domain_record_by_id(self, mock_put):
         mock_put.return_value.status_code = 200
-        mock_put.return_value.json.return_value = json.loads(
-            self._get_sample_data('domain_record'))
+        mock_put.return_value.content = self._get_sample_data('domain_record')
         domain_name = 'example.com'
         domain_record = 28448433
         dr = self.client.DomainRecords(domain=domain_name)
@@ -96,7 +92,7 @@ class TestDosaClientDomainRecordActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{"name": "www"}'
+        expected_data = {'name': 'www'}
         url, data = mock_put.call_args
         self.assertEqual(url[0],
                          '{}/domains/{}/records/{}'.format(endpoint,
@@ -104,8 +100,102 @@ class TestDosaClientDomainRecordActions(TestCase):
                                                            domain_record))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
-        self.assertEqual(data['data'], expected_data)
+        self.assertDictEqual(json.loads(data['data']), expected_data)
+
+    def _zone_response(self):
+        records = [
+            {'id': 1, 'type': 'SOA', 'name': '@', 'data': '1800', 'ttl': 1800},
+            {'id': 2, 'type': 'NS', 'name': '@', 'data': 'ns1.example.com',
+             'ttl': 1800},
+            {'id': 3, 'type': 'A', 'name': '@', 'data': '1.1.1.1',
+             'ttl': 1800},
+            {'id': 4, 'type': 'A', 'name': 'www', 'data': '1.1.1.1',
+             'ttl': 1800},
+            {'id': 5, 'type': 'A', 'name': 'api', 'data': '2.2.2.2',
+             'ttl': 1800},
+            {'id': 6, 'type': 'CNAME', 'name': 'old', 'data': '@',
+             'ttl': 1800},
+        ]
+        return {'domain_records': records, 'links': {},
+                'meta': {'total': len(records)}}
+
+    desired_records = [
+        {'type': 'A', 'name': '@', 'data': '1.1.1.1'},
+        {'type': 'A', 'name': 'www', 'data': '1.1.1.1', 'ttl': 300},
+        {'type': 'A', 'name': 'api', 'data': '3.3.3.3'},
+        {'type': 'TXT', 'name': '@', 'data': 'v=spf1 -all'},
+    ]
+
+    @patch('requests.Session.get')
+    def test_apply_dry_run(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(
+            self._zone_response()).encode()
+        dr = self.client.DomainRecords(domain='example.com')
+
+        changes = dr.apply(self.desired_records, dry_run=True)
+
+        self.assertEqual(mock_get.call_count, 1)
+        url, data = mock_get.call_args
+        self.assertEqual(url[0], '{}/domains/example.com/records'.format(
+            endpoint))
+        self.assertEqual(changes['create'], [self.desired_records[3]])
+        self.assertEqual(
+            [(current['id'], record) for current, record in
+             changes['update']],
+            [(4, self.desired_records[1]), (5, self.desired_records[2])])
+        self.assertEqual([current['id'] for current in changes['delete']],
+                         [6])
+
+    @patch('requests.Session.get')
+    def test_apply_no_prune_keeps_records(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(
+            self._zone_response()).encode()
+        dr = self.client.DomainRecords(domain='example.com')
+        record = {'type': 'A', 'name': 'www', 'data': '2.2.2.2'}
+
+        changes = dr.apply([record], dry_run=True, prune=False)
+
+        self.assertEqual(changes, {'create': [record], 'update': [],
+                                   'delete': []})
+
+    @patch('requests.Session.get')
+    def test_apply_ignored_types_not_replaced(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(
+            self._zone_response()).encode()
+        dr = self.client.DomainRecords(domain='example.com')
+        record = {'type': 'NS', 'name': '@', 'data': 'ns9.example.com'}
+
+        changes = dr.apply([record], dry_run=True)
+
+        self.assertEqual(changes['create'], [record])
+        self.assertEqual(changes['update'], [])
+        self.assertNotIn(2, [current['id'] for current in changes['delete']])
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.put')
+    @patch('requests.Session.delete')
+    def test_apply(self, mock_delete, mock_put, mock_post, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(
+            self._zone_response()).encode()
+        for mock_call in (mock_delete, mock_put, mock_post):
+            mock_call.return_value.status_code = 200
+            mock_call.return_value.content = b''
+        dr = self.client.DomainRecords(domain='example.com')
+
+        dr.apply(self.desired_records)
+
+        records_url = '{}/domains/example.com/records'.format(endpoint)
+        self.assertEqual(mock_post.call_args[0][0], records_url)
+        self.assertEqual(sorted(args[0] for args, kw in
+                                mock_put.call_args_list),
+                         [records_url + '/4', records_url + '/5'])
+        self.assertEqual(mock_delete.call_args[0][0], records_url + '/6')
 
     def _get_sample_data(self, path=''):
         return open(os.path.join(api_sample_data,
-                                 '{}.json'.format(path))).read()
+                                 '{}.json'.format(path)), 'rb').read()
@@ -1,7 +1,7 @@
 import json
 import os.path
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import dosa
 
@@ -11,11 +11,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientDropletActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -23,19 +22,17 @@ class TestDosaClientDropletActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_droplet_list(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('droplets'))
+        mock_get.return_value.content = self._get_sample_data('droplets')
         status, result = self.client.droplets.list()
         self.assertEqual(1, len(result['droplets']))
         self.assertTrue(mock_get.called)
@@ -45,22 +42,21 @@ class TestDosaClientDropletActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/droplets'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.get')
-    @patch('dosa.requests.post')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
     def test_dosa_droplet_create(self, mock_post, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         mock_post.return_value.status_code = 202
-        mock_post.return_value.json.return_value = json.loads(
-            self._get_sample_data('droplet_create'))
+        mock_post.return_value.content = self._get_sample_data(
+            'droplet_create')
         status, result = self.client.droplets.create(name='terminator',
                                                      region='nyc2',
                                                      size='512mb',
@@ -73,7 +69,7 @@ class TestDosaClientDropletActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        get_expected_data = {}
+        get_expected_data = None
         post_expected_data = {
             'name': 'terminator',
             'region': 'nyc2',
@@ -85,7 +81,7 @@ class TestDosaClientDropletActions(TestCase):
         self.assertEqual(url[0], '{}/sizes'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
-        self.assertDictEqual(json.loads(data['data']), get_expected_data)
+        self.assertEqual(data['data'], get_expected_data)
 
         url, data = mock_post.call_args
         self.assertEqual(url[0], '{}/droplets'.format(endpoint))
@@ -96,11 +92,11 @@ class TestDosaClientDropletActions(TestCase):
         for key, value in post_expected_data.items():
             self.assertEqual(received_data[key], value)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_droplet_by_id(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('droplet_by_id'))
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = self._get_sample_data('droplet_by_id')
         data_sample = json.loads(self._get_sample_data('droplet_by_id'))
         droplet_id = data_sample['droplet']['id']
         droplet_ips = [ip['ip_address']
@@ -117,18 +113,18 @@ class TestDosaClientDropletActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/droplets/{}'.format(endpoint, droplet_id))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.delete')
+    @patch('requests.Session.delete')
     def test_dosa_droplet_delete(self, mock_delete):
         mock_delete.return_value.status_code = 204
         # there's no response for delete droplet (No Content)
-        mock_delete.return_value.text = None
+        mock_delete.return_value.content = b''
         droplet_id = 12345
         status, result = self.client.droplets.delete(droplet_id)
 
@@ -146,6 +142,163 @@ class TestDosaClientDropletActions(TestCase):
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
 
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_dosa_droplet_create_many(self, mock_post, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('sizes')
+
+        def fake_post(url, params, data, headers):
+            names = json.loads(data)['names']
+            resp = MagicMock(status_code=202)
+            resp.content = json.dumps({
+                'droplets': [{'id': i, 'name': name}
+                             for i, name in enumerate(names)]}).encode()
+            return resp
+
+        mock_post.side_effect = fake_post
+        names = ['node-%s' % i for i in range(25)]
+        droplets = self.client.droplets.create_many(
+            names=names, region='nyc2', size='512mb',
+            image='ubuntu-14-04-x32', ssh_keys=[12345])
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_post.call_count, 3)
+        chunk_sizes = sorted(len(json.loads(data['data'])['names'])
+                             for url, data in mock_post.call_args_list)
+        self.assertEqual(chunk_sizes, [5, 10, 10])
+        self.assertEqual([droplet['name'] for droplet in droplets], names)
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_dosa_droplet_create_many_partial_failure(self, mock_post,
+                                                      mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('sizes')
+
+        def fake_post(url, params, data, headers):
+            names = json.loads(data)['names']
+            if 'node-10' in names:
+                resp = MagicMock(status_code=422)
+                resp.content = b'{"id": "unprocessable_entity"}'
+                return resp
+            resp = MagicMock(status_code=202)
+            resp.content = json.dumps({
+                'droplets': [{'id': i, 'name': name}
+                             for i, name in enumerate(names)]}).encode()
+            return resp
+
+        mock_post.side_effect = fake_post
+        names = ['node-%s' % i for i in range(30)]
+        with self.assertRaises(dosa.PartialCreateError) as ctx:
+            self.client.droplets.create_many(
+                names=names, region='nyc2', size='512mb',
+                image='ubuntu-14-04-x32')
+
+        error = ctx.exception
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(error.status_code, 422)
+        self.assertEqual([droplet['name'] for droplet in error.created],
+                         names[:10] + names[20:])
+        self.assertEqual(error.failed_names, names[10:20])
+        self.assertIsInstance(error.failed[0][1], dosa.ClientError)
+
+    def test_dosa_droplet_create_many_invalid_size(self):
+        with patch('requests.Session.get') as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.content = self._get_sample_data('sizes')
+            with self.assertRaises(AssertionError):
+                self.client.droplets.create_many(
+                    names=['node'], region='nyc2', size='nosuchsize',
+                    image='ubuntu-14-04-x32')
+
+    @patch('dosa.time.sleep')
+    @patch('requests.Session.get')
+    def test_dosa_droplets_wait_until(self, mock_get, mock_sleep):
+        ticks = [
+            {1: 'new', 2: 'new', 3: 'active'},
+            {1: 'active', 2: 'new', 3: 'active'},
+            {1: 'active', 2: 'new', 3: 'active'},
+            {1: 'active', 2: 'active', 3: 'active'},
+        ]
+
+        def make_response(statuses):
+            resp = MagicMock(status_code=200, headers={})
+            resp.content = json.dumps({
+                'droplets': [{'id': id, 'status': status}
+                             for id, status in statuses.items()],
+                'links': {},
+                'meta': {'total': len(statuses)}}).encode()
+            return resp
+
+        mock_get.side_effect = [make_response(tick) for tick in ticks]
+        ready = self.client.droplets.wait_until([1, 2, 3], interval=2)
+
+        self.assertEqual([droplet['id'] for droplet in ready], [3, 1, 2])
+        self.assertEqual(mock_get.call_count, 4)
+        delays = [args[0] for args, kw in mock_sleep.call_args_list]
+        self.assertEqual(delays, [2, 2, 3])
+
+    @patch('dosa.time.sleep')
+    @patch('requests.Session.get')
+    def test_dosa_droplets_wait_until_timeout(self, mock_get, mock_sleep):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = self._get_sample_data('droplets')
+        droplet_id = json.loads(
+            self._get_sample_data('droplets'))['droplets'][0]['id']
+        with self.assertRaises(TimeoutError):
+            list(self.client.droplets.wait_until(
+                [droplet_id], status='off', timeout=0))
+
+    @patch('requests.Session.get')
+    def test_dosa_droplet_snapshot(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = self._get_sample_data('droplet_by_id')
+        droplet_id = json.loads(
+            self._get_sample_data('droplet_by_id'))['droplet']['id']
+        droplet = self.client.Droplet(droplet_id)
+        droplet.status()
+        droplet.ip_addresses()
+        self.assertEqual(mock_get.call_count, 1)
+        droplet.refresh()
+        self.assertEqual(mock_get.call_count, 2)
+
+        with patch('dosa.time.monotonic',
+                   return_value=droplet.snapshot_at + droplet.max_age + 1):
+            droplet.status()
+        self.assertEqual(mock_get.call_count, 3)
+
+        droplet.max_age = None
+        with patch('dosa.time.monotonic', return_value=10 ** 9):
+            droplet.status()
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch('requests.Session.get')
+    def test_dosa_droplets_populate(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = self._get_sample_data('droplets')
+        listed = json.loads(self._get_sample_data('droplets'))['droplets']
+        droplet = self.client.Droplet(listed[0]['id'])
+        # listing stops at first page, where droplet is found, though
+        # second one has been prefetched meanwhile
+        self.assertEqual(self.client.droplets.populate([droplet]), [])
+        self.assertEqual(droplet.status(), listed[0]['status'])
+        self.assertEqual(mock_get.call_count, 2)
+
+        unknown = self.client.Droplet(-1)
+        self.assertEqual(self.client.droplets.populate([unknown]), [unknown])
+        self.assertIsNone(unknown.snapshot)
+
+        droplets = self.client.droplets.as_resources()
+        self.assertIsInstance(droplets[0], dosa.Droplet)
+        self.assertEqual(droplets[0].path, 'droplets/%s' % listed[0]['id'])
+        calls = mock_get.call_count
+        self.assertEqual(droplets[0].status(), listed[0]['status'])
+        self.assertEqual(mock_get.call_count, calls)
+
     def _get_sample_data(self, path=''):
         return open(os.path.join(api_sample_data,
-                                 '{}.json'.format(path))).read()
+                                 '{}.json'.format(path)), 'rb').read()
@@ -19,11 +19,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientFirewallActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -34,19 +33,17 @@ class TestDosaClientFirewallActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_firewall_list(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('firewalls'))
+        mock_get.return_value.content = self._get_sample_data('firewalls')
         status, result = self.client.firewalls.list()
         self.assertEqual(2, len(result['firewalls']))
         self.assertTrue(mock_get.called)
@@ -56,18 +53,17 @@ class TestDosaClientFirewallActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/firewalls'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_firewall_search(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('firewalls'))
+        mock_get.return_value.content = self._get_sample_data('firewalls')
 
         firewall = self.client.firewalls.get_by_name('webserver')
 
@@ -80,8 +76,8 @@ class TestDosaClientFirewallActions(TestCase):
             'Content-Type': 'application/json',
             'authorization': 'Bearer {}'.format(self.api_key)
         }
-        expected_params = {}
-        expected_data = '{}'
+        expected_params = {'per_page': dosa.MAX_PER_PAGE}
+        expected_data = None
         url, data = mock_get.call_args
 
         self.assertEqual(url[0], '{}/firewalls'.format(endpoint))
@@ -89,11 +85,11 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.post')
+    @patch('requests.Session.post')
     def test_dosa_firewall_create(self, mock_post):
         mock_post.return_value.status_code = 202
-        mock_post.return_value.json.return_value = json.loads(
-            self._get_sample_data('firewall_create'))
+        mock_post.return_value.content = self._get_sample_data(
+            'firewall_create')
 
         # set firewall data
         params = {
@@ -129,11 +125,11 @@ class TestDosaClientFirewallActions(TestCase):
         data_json = json.loads(data['data'])
         self.assertEqual(data_json['name'], params['name'])
 
-    @patch('dosa.requests.delete')
+    @patch('requests.Session.delete')
     def test_dosa_firewall_delete(self, mock_delete):
         mock_delete.return_value.status_code = 204
         # there's no response for delete firewall (No Content)
-        mock_delete.return_value.text = None
+        mock_delete.return_value.content = b''
         firewall_id = '99d5ef9c-2aa5-40ad-8507-2af7d65d099a'
         status, result = self.client.firewalls.delete(firewall_id)
 
@@ -152,8 +148,8 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
 
-    @patch('dosa.requests.get')
-    @patch('dosa.requests.post')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
     def test_dosa_firewall_add_droplet(self, mock_post, mock_get):
         # get a droplet and firewall id
         droplet_id = 12345
@@ -161,12 +157,11 @@ class TestDosaClientFirewallActions(TestCase):
 
         # prepare a response for a firewall object
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('firewall'))
+        mock_get.return_value.content = self._get_sample_data('firewall')
 
         mock_post.return_value.status_code = 204
         # there's no response for adding droplet (No Content)
-        mock_post.return_value.text = None
+        mock_post.return_value.content = b''
 
         # get a firewall object
         firewall = dosa.Firewall(
@@ -192,8 +187,8 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
 
-    @patch('dosa.requests.get')
-    @patch('dosa.requests.post')
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
     def test_dosa_firewall_add_droplet_already(self, mock_post, mock_get):
         """Test adding a droplet to firewall, which already have such
         droplet"""
@@ -210,11 +205,11 @@ class TestDosaClientFirewallActions(TestCase):
         firewall_data['firewall']['droplet_ids'] = [droplet_id]
 
         # assign data to response
-        mock_get.return_value.json.return_value = firewall_data
+        mock_get.return_value.content = json.dumps(firewall_data).encode()
 
         mock_post.return_value.status_code = 204
         # there's no response for adding droplet (No Content)
-        mock_post.return_value.text = None
+        mock_post.return_value.content = b''
 
         # get a firewall object
         firewall = dosa.Firewall(
@@ -227,8 +222,8 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertFalse(mock_post.called)
         self.assertEqual(result, None)
 
-    @patch('dosa.requests.get')
-    @patch('dosa.requests.delete')
+    @patch('requests.Session.get')
+    @patch('requests.Session.delete')
     def test_dosa_firewall_delete_droplet(self, mock_delete, mock_get):
         # get a droplet and firewall id
         droplet_id = 12345
@@ -242,11 +237,11 @@ class TestDosaClientFirewallActions(TestCase):
         firewall_data['firewall']['droplet_ids'] = [droplet_id]
 
         # assign data to response
-        mock_get.return_value.json.return_value = firewall_data
+        mock_get.return_value.content = json.dumps(firewall_data).encode()
 
         mock_delete.return_value.status_code = 204
         # there's no response for deleting droplet (No Content)
-        mock_delete.return_value.text = None
+        mock_delete.return_value.content = b''
 
         # get a firewall object
         firewall = dosa.Firewall(
@@ -272,8 +267,8 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
 
-    @patch('dosa.requests.get')
-    @patch('dosa.requests.delete')
+    @patch('requests.Session.get')
+    @patch('requests.Session.delete')
     def test_dosa_firewall_delete_droplet_error(self, mock_delete, mock_get):
         """Test adding a droplet to firewall, which already have such
         droplet"""
@@ -284,12 +279,11 @@ class TestDosaClientFirewallActions(TestCase):
 
         # prepare a response for a firewall object
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('firewall'))
+        mock_get.return_value.content = self._get_sample_data('firewall')
 
         mock_delete.return_value.status_code = 204
         # there's no response for adding droplet (No Content)
-        mock_delete.return_value.text = None
+        mock_delete.return_value.content = b''
 
         # get a firewall object
         firewall = dosa.Firewall(
@@ -302,10 +296,103 @@ class TestDosaClientFirewallActions(TestCase):
         self.assertFalse(mock_delete.called)
         self.assertEqual(result, None)
 
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.delete')
+    def test_dosa_firewall_set_droplets(self, mock_delete, mock_post,
+                                        mock_get):
+        firewall_id = '99d5ef9c-2aa5-40ad-8507-2af7d65d099a'
+        firewall_data = json.loads(self._get_sample_data('firewall'))
+        firewall_data['firewall']['droplet_ids'] = [1, 2, 3]
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(firewall_data).encode()
+        for mock_call in (mock_post, mock_delete):
+            mock_call.return_value.status_code = 204
+            mock_call.return_value.content = b''
+
+        firewall = dosa.Firewall(
+            self.api_key, 'firewalls/{id}', id=firewall_id)
+        wanted_ids = [3] + list(range(100, 160))
+        result = firewall.set_droplets(wanted_ids)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(result['added'], list(range(100, 160)))
+        self.assertEqual(result['removed'], [1, 2])
+
+        # 60 new droplets are added in two requests
+        self.assertEqual(mock_post.call_count, 2)
+        posted = [json.loads(data['data'])['droplet_ids']
+                  for url, data in mock_post.call_args_list]
+        self.assertEqual(posted, [list(range(100, 150)),
+                                  list(range(150, 160))])
+        self.assertEqual(mock_delete.call_count, 1)
+        url, data = mock_delete.call_args
+        self.assertEqual(url[0], '{}/firewalls/{}/droplets'.format(
+            endpoint, firewall_id))
+        self.assertEqual(json.loads(data['data']),
+                         {'droplet_ids': [1, 2]})
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    def test_dosa_firewall_add_droplets_nothing_new(self, mock_post,
+                                                    mock_get):
+        firewall_data = json.loads(self._get_sample_data('firewall'))
+        firewall_data['firewall']['droplet_ids'] = [1, 2]
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(firewall_data).encode()
+
+        firewall = dosa.Firewall(self.api_key, 'firewalls/{id}', id='x')
+        self.assertEqual(firewall.add_droplets([1, 2, 2]), [])
+        self.assertFalse(mock_post.called)
+
+    @patch('requests.Session.get')
+    def test_dosa_firewall_search_indexed(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('firewalls')
+
+        first = self.client.firewalls.get_by_name('webserver')
+        second = self.client.firewalls.get_by_name('webserver')
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_dosa_firewall_search_not_found(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('firewalls')
+
+        with self.assertRaises(dosa.NameNotFoundError):
+            self.client.firewalls.get_by_name('nosuchfirewall')
+
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.delete')
+    def test_dosa_firewall_index_follows_changes(self, mock_delete, mock_post,
+                                                 mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = self._get_sample_data('firewalls')
+        mock_post.return_value.status_code = 202
+        mock_post.return_value.content = self._get_sample_data(
+            'firewall_create')
+        mock_delete.return_value.status_code = 204
+        mock_delete.return_value.content = b''
+
+        webserver = self.client.firewalls.get_by_name('webserver')
+        created = self.client.firewalls.create(name='firewall')
+        self.assertEqual(
+            self.client.firewalls.get_by_name('firewall').id, created.id)
+        self.assertEqual(mock_get.call_count, 1)
+
+        self.client.firewalls.delete(webserver.id)
+        mock_get.return_value.content = json.dumps({
+            'firewalls': [], 'links': {}, 'meta': {'total': 0}}).encode()
+        with self.assertRaises(dosa.NameNotFoundError):
+            self.client.firewalls.get_by_name('webserver')
+        self.assertEqual(mock_get.call_count, 2)
+
     def _get_sample_data(self, path):
         filename = '{}.json'.format(path)
 
-        with open(os.path.join(api_sample_data, filename)) as handle:
+        with open(os.path.join(api_sample_data, filename), 'rb') as handle:
             data = handle.read()
 
         return data
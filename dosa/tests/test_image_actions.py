@@ -1,7 +1,7 @@
 import json
 import os.path
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import dosa
 
@@ -11,11 +11,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientDropletActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -23,19 +22,17 @@ class TestDosaClientDropletActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_image_list(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('images'))
+        mock_get.return_value.content = self._get_sample_data('images')
         status, result = self.client.images.list()
         self.assertEqual(1, len(result['images']))
         self.assertTrue(mock_get.called)
@@ -45,32 +42,30 @@ class TestDosaClientDropletActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/images'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_image_n_of_requests(self, mock_get):
         """Test n of requests equal to n of pages"""
 
         # prepare a fake request
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('images'))
+        mock_get.return_value.content = self._get_sample_data('images')
 
         images = self.client.images.all()
 
         self.assertEqual(len(images), 1)
         self.assertEqual(mock_get.call_count, 1)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_image_by_search(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('images_search'))
+        mock_get.return_value.content = self._get_sample_data('images_search')
         images_list = self.client.images.search('ubuntu')
 
         # image is a list of dictionaries
@@ -83,8 +78,8 @@ class TestDosaClientDropletActions(TestCase):
             'Content-Type': 'application/json',
             'authorization': 'Bearer {}'.format(self.api_key)
         }
-        expected_params = {}
-        expected_data = '{}'
+        expected_params = {'per_page': dosa.MAX_PER_PAGE}
+        expected_data = None
         url, data = mock_get.call_args
 
         self.assertEqual(url[0], '{}/images'.format(endpoint))
@@ -92,6 +87,57 @@ class TestDosaClientDropletActions(TestCase):
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
+    @patch('requests.Session.get')
+    def test_dosa_image_all_pages_in_order(self, mock_get):
+        def fake_get(url, params, data, headers):
+            page = params.get('page', 1)
+            resp = MagicMock(status_code=200)
+            resp.content = json.dumps({
+                'images': [{'id': page * 10 + i} for i in range(2)],
+                'meta': {'total': 10}}).encode()
+            return resp
+
+        mock_get.side_effect = fake_get
+        images = self.client.images.all(per_page=2, max_workers=3)
+
+        self.assertEqual(mock_get.call_count, 5)
+        self.assertEqual([image['id'] for image in images],
+                         [10, 11, 20, 21, 30, 31, 40, 41, 50, 51])
+
+    @patch('requests.Session.get')
+    def test_dosa_image_all_empty(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps({
+            'images': [], 'meta': {'total': 0}}).encode()
+
+        self.assertEqual(self.client.images.all(), [])
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_dosa_image_iter_all_follows_next(self, mock_get):
+        def fake_get(url, params, data, headers):
+            page = int(params.get('page', 1))
+            resp = MagicMock(status_code=200)
+            links = {}
+            if page < 3:
+                links = {'pages': {'next': '{}/images?page={}&per_page=2'
+                                   .format(endpoint, page + 1)}}
+            resp.content = json.dumps({
+                'images': [{'id': page * 10 + i} for i in range(2)],
+                'links': links,
+                'meta': {'total': 6}}).encode()
+            return resp
+
+        mock_get.side_effect = fake_get
+        images = self.client.images.iter_all(per_page=2)
+
+        self.assertEqual(next(images)['id'], 10)
+        self.assertEqual([image['id'] for image in images],
+                         [11, 20, 21, 30, 31])
+        self.assertEqual(mock_get.call_count, 3)
+        url, data = mock_get.call_args
+        self.assertDictEqual(data['params'], {'page': '3', 'per_page': '2'})
+
     def _get_sample_data(self, path=''):
         return open(os.path.join(api_sample_data,
-                                 '{}.json'.format(path))).read()
+                                 '{}.json'.format(path)), 'rb').read()
@@ -0,0 +1,95 @@
+import os.path
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+
+import dosa
+from dosa.index import ImageIndex, NameIndex
+
+api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
+
+
+def make_image(id, distribution, slug, regions, name=''):
+    return {'id': id, 'distribution': distribution, 'slug': slug,
+            'name': name, 'regions': regions}
+
+
+IMAGES = [
+    make_image(1, 'Ubuntu', 'ubuntu-18-04-x64', ['nyc1', 'sgp1']),
+    make_image(2, 'CentOS', 'centos-7-x64', ['nyc1']),
+    make_image(3, 'Ubuntu', None, ['ams3'], name='my ubuntu snapshot'),
+    make_image(4, 'Debian', 'debian-9-x64', ['sgp1'], name='buntu'),
+]
+
+
+class TestImageIndex(TestCase):
+    def setUp(self):
+        self.index = ImageIndex()
+        self.index.refresh(IMAGES)
+
+    def test_same_results_as_scan(self):
+        for word in ('ubuntu', 'x64', 'cent', 'u', 'nothing', 'UBUNTU'):
+            for region in (None, 'nyc1', 'sgp1', 'nowhere'):
+                expected = [image for image in IMAGES
+                            if dosa.image_matches(image, word, region)]
+                self.assertEqual(self.index.search(word, region), expected)
+
+    def test_search_name(self):
+        images = self.index.search('buntu', fields=('name',))
+        self.assertEqual([image['id'] for image in images], [3, 4])
+
+    def test_incremental_refresh(self):
+        images = list(IMAGES)
+        images[1] = dict(images[1], slug='centos-8-x64')
+        del images[3]
+        self.assertEqual(self.index.refresh(images), 2)
+        self.assertEqual(self.index.refresh(images), 0)
+        self.assertEqual(self.index.search('centos-8')[0]['id'], 2)
+        self.assertEqual(self.index.search('debian'), [])
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'cache', 'images.json')
+            ImageIndex(path).refresh(IMAGES)
+            index = ImageIndex(path)
+            self.assertEqual(len(index), len(IMAGES))
+            self.assertFalse(index.is_stale())
+            self.assertEqual(index.search('ubuntu', 'sgp1'), IMAGES[:1])
+
+
+class TestImagesSearchWithIndex(TestCase):
+    def setUp(self):
+        self.index = ImageIndex()
+        self.client = dosa.Client('my_fake_api_key', image_index=self.index)
+
+    @patch('requests.Session.get')
+    def test_search_refreshes_stale_index(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = open(
+            os.path.join(api_sample_data, 'images_search.json'), 'rb').read()
+        self.assertEqual(len(self.client.images.search('ubuntu')), 1)
+        self.assertEqual(len(self.client.images.search('ubuntu')), 1)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('dosa.retry.time.sleep')
+    @patch('requests.Session.get')
+    def test_search_offline(self, mock_get, mock_sleep):
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+        self.index.refresh(IMAGES)
+        self.index.updated_at = 0
+        images = self.client.images.search('centos')
+        self.assertEqual([image['id'] for image in images], [2])
+
+
+class TestNameIndex(TestCase):
+    def test_duplicate_names_first_wins(self):
+        index = NameIndex()
+        index.rebuild([{'id': 1, 'name': 'web'}, {'id': 2, 'name': 'db'},
+                       {'id': 3, 'name': 'web'}])
+        self.assertEqual(index.get('web'), 1)
+        index.add('db', 4)
+        self.assertEqual(index.get('db'), 2)
+        index.discard_id(1)
+        self.assertIsNone(index.get('web'))
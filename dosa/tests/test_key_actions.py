@@ -1,5 +1,7 @@
+import base64
 import json
 import os.path
+import tempfile
 from unittest import TestCase
 from unittest.mock import patch
 
@@ -11,11 +13,10 @@ api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
 
 class TestDosaClientKeyActions(TestCase):
     @classmethod
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def setUp(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data(self, 'sizes'))
+        mock_get.return_value.content = self._get_sample_data(self, 'sizes')
         self.api_key = 'my_fake_api_key'
         self.client = dosa.Client(self.api_key)
 
@@ -23,21 +24,19 @@ class TestDosaClientKeyActions(TestCase):
     def tearDown(self):
         pass
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_client_created(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('sizes'))
+        mock_get.return_value.content = self._get_sample_data('sizes')
         client = dosa.Client(self.api_key)
         self.assertIsInstance(client, dosa.Client)
 
-    @patch('dosa.requests.post')
+    @patch('requests.Session.post')
     def test_dosa_key_create(self, mock_post):
         ssh_key_name = 'MyFakeSSHKey'
         ssh_key_value = 'myfakesshkey'
         mock_post.return_value.status_code = 201
-        mock_post.return_value.json.return_value = json.loads(
-            self._get_sample_data('keys_create'))
+        mock_post.return_value.content = self._get_sample_data('keys_create')
         status, result = self.client.keys.create(
             name=ssh_key_name, public_key=ssh_key_value)
         self.assertEqual(1, len(result))
@@ -58,11 +57,10 @@ class TestDosaClientKeyActions(TestCase):
         self.assertDictEqual(data['params'], expected_params)
         self.assertDictEqual(json.loads(data['data']), expected_data)
 
-    @patch('dosa.requests.get')
+    @patch('requests.Session.get')
     def test_dosa_key_list(self, mock_get):
         mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = json.loads(
-            self._get_sample_data('keys'))
+        mock_get.return_value.content = self._get_sample_data('keys')
         status, result = self.client.keys.list()
         self.assertTrue(mock_get.called)
 
@@ -71,7 +69,7 @@ class TestDosaClientKeyActions(TestCase):
             'authorization': 'Bearer {}'.format(self.api_key)
         }
         expected_params = {}
-        expected_data = '{}'
+        expected_data = None
         url, data = mock_get.call_args
         self.assertEqual(url[0], '{}/account/keys'.format(endpoint))
         self.assertDictEqual(data['headers'], expected_headers)
@@ -79,6 +77,53 @@ class TestDosaClientKeyActions(TestCase):
         self.assertDictEqual(data['params'], expected_params)
         self.assertEqual(data['data'], expected_data)
 
+    @patch('requests.Session.get')
+    @patch('requests.Session.post')
+    @patch('requests.Session.delete')
+    def test_dosa_sync_ssh_keys(self, mock_delete, mock_post, mock_get):
+        keys_data = json.loads(self._get_sample_data('keys'))
+        registered_key = keys_data['ssh_keys'][0]
+        stale_key = {'id': 1, 'name': 'old laptop', 'public_key': '',
+                     'fingerprint': 'aa:bb'}
+        keys_data['ssh_keys'].append(stale_key)
+        keys_data['meta']['total'] = 2
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = json.dumps(keys_data).encode()
+        mock_post.return_value.status_code = 201
+        mock_post.return_value.content = json.dumps({
+            'ssh_key': {'id': 2, 'name': 'new.pub'}}).encode()
+        mock_delete.return_value.status_code = 204
+        mock_delete.return_value.content = b''
+
+        with tempfile.TemporaryDirectory() as keysdir:
+            # registered key, under another name
+            with open(os.path.join(keysdir, 'renamed.pub'), 'w') as f:
+                f.write(registered_key['public_key'])
+            new_key = 'ssh-rsa %s new@example' % base64.b64encode(
+                b'new key').decode()
+            with open(os.path.join(keysdir, 'new.pub'), 'w') as f:
+                f.write(new_key + '\n')
+            result = self.client.sync_ssh_keys(keysdir)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertDictEqual(json.loads(mock_post.call_args[1]['data']),
+                             {'name': 'new.pub', 'public_key': new_key})
+        self.assertEqual(mock_delete.call_count, 1)
+        self.assertEqual(mock_delete.call_args[0][0],
+                         '{}/account/keys/1'.format(endpoint))
+        self.assertEqual(result, {'new': {'new.pub'},
+                                  'deleted': {'old laptop'},
+                                  'all_ids': [registered_key['id'], 2]})
+
+    def test_key_fingerprint(self):
+        keys_data = json.loads(self._get_sample_data('keys'))
+        key = keys_data['ssh_keys'][0]
+        self.assertEqual(dosa.key_fingerprint(key['public_key']),
+                         key['fingerprint'])
+        with self.assertRaises(ValueError):
+            dosa.key_fingerprint('not a key')
+
     def _get_sample_data(self, path=''):
         return open(os.path.join(api_sample_data,
-                                 '{}.json'.format(path))).read()
+                                 '{}.json'.format(path)), 'rb').read()
@@ -0,0 +1,72 @@
+import os.path
+from unittest import TestCase
+from unittest.mock import patch
+
+import dosa
+from dosa.metrics import Histogram, MetricsCollector, path_template
+
+api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
+
+
+class TestPathTemplate(TestCase):
+    def test_templates(self):
+        self.assertEqual(path_template('droplets', 'droplets', 'droplets/12'),
+                         'droplets/{id}')
+        self.assertEqual(
+            path_template('firewalls/{id}',
+                          'firewalls/99d5ef9c-2aa5-40ad-8507-2af7d65d099a',
+                          'firewalls/99d5ef9c-2aa5-40ad-8507-2af7d65d099a/'
+                          'droplets'),
+            'firewalls/{id}/droplets')
+        self.assertEqual(
+            path_template('domains/{domain}/records',
+                          'domains/example.com/records',
+                          'domains/example.com/records'),
+            'domains/{domain}/records')
+
+
+class TestHistogram(TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        for value in [0.02] * 90 + [0.3] * 9 + [100]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 0.025)
+        self.assertEqual(histogram.percentile(90), 0.025)
+        self.assertEqual(histogram.percentile(99), 0.5)
+        self.assertEqual(histogram.percentile(100), 100)
+
+
+class TestClientHooks(TestCase):
+    def setUp(self):
+        self.client = dosa.Client('my_fake_api_key')
+
+    @patch('requests.Session.get')
+    def test_hooks_and_collector(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = b'{"droplet": {}}'
+        pre_events = []
+        collector = MetricsCollector()
+        self.client.add_hook('pre_request', pre_events.append)
+        self.client.add_hook('post_request', collector)
+
+        self.client.Droplet(1).info()
+        self.client.Droplet(2).info()
+
+        self.assertEqual([event.path for event in pre_events],
+                         ['droplets/1', 'droplets/2'])
+        self.assertIsNone(pre_events[0].status_code)
+        summary = collector.summary()
+        stats = summary[('GET', 'droplets/{id}')]
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['errors'], 0)
+        self.assertEqual(stats['bytes'], 30)
+        self.assertIsNotNone(stats['p99'])
+
+    @patch('dosa.logging.debug')
+    @patch('dosa.CurlCommand.__str__')
+    def test_debug_hints_lazy(self, mock_str, mock_debug):
+        dosa.show_debug_hints('GET', 'url', {}, {}, None)
+        self.assertFalse(mock_debug.called)
+        self.assertFalse(mock_str.called)
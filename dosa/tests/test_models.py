@@ -0,0 +1,103 @@
+import json
+import os.path
+from unittest import TestCase
+from unittest.mock import patch
+
+import dosa
+from dosa import models
+
+api_sample_data = os.path.join(os.path.dirname(__file__), 'api_sample_data')
+
+
+def sample_data(path):
+    with open(os.path.join(api_sample_data, '{}.json'.format(path)),
+              'rb') as f:
+        return f.read()
+
+
+class TestModels(TestCase):
+    def setUp(self):
+        self.raw = json.loads(sample_data('droplet_by_id'))['droplet']
+
+    def test_droplet(self):
+        droplet = models.Droplet(self.raw)
+        self.assertFalse(hasattr(droplet, '__dict__'))
+        self.assertEqual(droplet.id, self.raw['id'])
+        self.assertEqual(droplet.status, self.raw['status'])
+        self.assertEqual(droplet.ip_addresses, [
+            net['ip_address'] for net in self.raw['networks']['v4']])
+        self.assertEqual(droplet.region.slug, self.raw['region']['slug'])
+        with self.assertRaises(AttributeError):
+            droplet.undeclared = 1
+
+    def test_nested_decoded_once(self):
+        droplet = models.Droplet(self.raw)
+        # kept as is till accessed
+        self.assertIs(droplet._region, self.raw['region'])
+        region = droplet.region
+        self.assertIsInstance(region, models.Region)
+        self.assertIs(droplet.region, region)
+        self.assertIsInstance(droplet.networks.v4, tuple)
+
+    def test_to_dict(self):
+        droplet = models.Droplet(self.raw)
+        droplet.region
+        obj = droplet.to_dict()
+        self.assertEqual(obj['region']['slug'], self.raw['region']['slug'])
+        self.assertEqual(models.Droplet(obj), droplet)
+
+    def test_missing_fields(self):
+        droplet = models.Droplet(id=1)
+        self.assertIsNone(droplet.name)
+        self.assertIsNone(droplet.region)
+        self.assertEqual(droplet.ip_addresses, [])
+
+
+class TestCollectionModels(TestCase):
+    def setUp(self):
+        self.client = dosa.Client('my_fake_api_key')
+
+    @patch('requests.Session.get')
+    def test_all_and_iter_all(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = sample_data('droplets')
+        droplets = self.client.droplets.all(models=True)
+        self.assertIsInstance(droplets[0], models.Droplet)
+        droplets = list(self.client.droplets.iter_all(models=True))
+        self.assertIsInstance(droplets[0], models.Droplet)
+        # dicts unless asked for
+        self.assertIsInstance(self.client.droplets.all()[0], dict)
+
+    def test_model_pages_not_cached(self):
+        transport = dosa.transport.MemoryTransport()
+
+        def page(params):
+            page = int(params.get('page', 1))
+            return {'images': [{'id': page * 10 + i} for i in range(2)],
+                    'meta': {'total': 6}}
+
+        transport.add('GET', 'images', page, headers={'ETag': '"v1"'})
+        client = dosa.Client('my_fake_api_key', transport=transport)
+        session = client.session
+        images = client.images.all(per_page=2, models=True)
+        self.assertEqual([image.id for image in images],
+                         [10, 11, 20, 21, 30, 31])
+        list(client.images.iter_all(per_page=2, models=True))
+        self.assertEqual(len(session.cache.entries), 0)
+        self.assertEqual(len(session.validators.entries), 0)
+        # dicts are cached as before
+        client.images.all(per_page=2)
+        self.assertEqual(len(session.cache.entries), 3)
+        self.assertEqual(len(session.validators.entries), 3)
+
+    @patch('requests.Session.get')
+    def test_collection_without_model(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {}
+        mock_get.return_value.content = (
+            b'{"actions": [{"id": 1}], "meta": {"total": 1}}')
+        actions = dosa.Collection('my_fake_api_key', 'actions',
+                                  session=self.client.session)
+        with self.assertRaises(TypeError):
+            actions.all(models=True)
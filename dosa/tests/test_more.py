@@ -0,0 +1,117 @@
+import socket
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from dosa import more
+from dosa.more import probe_ssh
+
+
+class FakeSSHServer(object):
+    """Accepts connections and sends `banner` after `delay` seconds"""
+
+    def __init__(self, banner=b'SSH-2.0-OpenSSH_7.4\r\n', delay=0):
+        self.banner = banner
+        self.delay = delay
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(16)
+        self.address = self.sock.getsockname()
+        self.stopped = threading.Event()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, addr = self.sock.accept()
+            except OSError:
+                return
+            if not self.stopped.wait(self.delay):
+                try:
+                    conn.sendall(self.banner)
+                except OSError:
+                    pass
+            conn.close()
+
+    def close(self):
+        self.stopped.set()
+        self.sock.close()
+
+
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    address = sock.getsockname()
+    sock.close()
+    return address
+
+
+class TestProbeSSH(TestCase):
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+
+    def server(self, **kw):
+        server = FakeSSHServer(**kw)
+        self.servers.append(server)
+        return server.address
+
+    def test_banner(self):
+        hosts = [self.server() for i in range(3)]
+        reachable = list(probe_ssh(hosts, banner=True, deadline=5))
+        self.assertEqual(len(reachable), 3)
+        self.assertEqual(reachable[0].banner, 'SSH-2.0-OpenSSH_7.4')
+
+    def test_tcp_only(self):
+        host = self.server(banner=b'')
+        reachable = list(probe_ssh([host], deadline=5))
+        self.assertEqual(reachable[0].host, host)
+        self.assertIsNone(reachable[0].banner)
+
+    def test_streams_and_times_out(self):
+        fast = self.server()
+        not_ssh = self.server(banner=b'HTTP/1.1 400 Bad Request\r\n')
+        down = closed_port()
+        probes = probe_ssh([down, not_ssh, fast], banner=True, deadline=1,
+                           interval=0.05)
+        # fast host is yielded before the deadline is hit
+        self.assertEqual(next(probes).host, fast)
+        with self.assertRaises(TimeoutError) as cm:
+            next(probes)
+        self.assertIn(str(down), str(cm.exception))
+
+    def test_max_concurrent(self):
+        hosts = [self.server(delay=0.05) for i in range(6)]
+        reachable = list(probe_ssh(hosts, banner=True, deadline=5,
+                                   max_concurrent=2))
+        self.assertEqual(len(reachable), 6)
+
+    def test_unresolved_names_are_retried(self):
+        host = self.server()
+        resolve = more.resolve
+        lookups = []
+
+        def fake_resolve(name, port, flags=0):
+            if name == 'no-such-host.invalid':
+                raise socket.gaierror(socket.EAI_NONAME, 'not known')
+            if name != 'new-droplet':
+                return resolve(name, port, flags)
+            lookups.append(name)
+            # DNS record shows up on third lookup
+            if len(lookups) < 3:
+                raise socket.gaierror(socket.EAI_NONAME, 'not known')
+            return resolve(host[0], port, flags)
+
+        with patch('dosa.more.resolve', fake_resolve):
+            probes = probe_ssh(
+                ['no-such-host.invalid', ('new-droplet', host[1]), host],
+                banner=True, deadline=1, interval=0.05)
+            self.assertEqual(next(probes).host, host)
+            self.assertEqual(next(probes).host, ('new-droplet', host[1]))
+            with self.assertRaises(TimeoutError) as cm:
+                next(probes)
+        self.assertEqual(len(lookups), 3)
+        self.assertIn('no-such-host.invalid', str(cm.exception))
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from dosa.ratelimit import Governor, RateBudget
+
+
+class TestGovernor(TestCase):
+    def setUp(self):
+        self.governor = Governor(low_water=0.1)
+
+    def test_unknown_budget_not_paced(self):
+        self.assertEqual(self.governor.reserve(now=1000), 0)
+
+    def test_budget_from_headers(self):
+        self.governor.update({'RateLimit-Limit': '5000',
+                              'RateLimit-Remaining': '4999',
+                              'RateLimit-Reset': '1060'})
+        self.assertEqual(self.governor.budget, RateBudget(5000, 4999, 1060))
+        self.assertEqual(self.governor.reserve(now=1000), 0)
+        self.assertEqual(self.governor.budget.remaining, 4998)
+
+    def test_out_of_order_responses(self):
+        self.governor.update({'RateLimit-Limit': '5000',
+                              'RateLimit-Remaining': '10',
+                              'RateLimit-Reset': '1060'})
+        self.governor.update({'RateLimit-Limit': '5000',
+                              'RateLimit-Remaining': '12',
+                              'RateLimit-Reset': '1060'})
+        self.assertEqual(self.governor.budget.remaining, 10)
+
+    def test_low_budget_paced_evenly(self):
+        self.governor.update({'RateLimit-Limit': '100',
+                              'RateLimit-Remaining': '6',
+                              'RateLimit-Reset': '1060'})
+        delays = [self.governor.reserve(now=1000) for i in range(3)]
+        # 60 seconds left for 6 requests
+        self.assertEqual(delays, [0, 10, 22])
+
+    def test_budget_refilled_after_reset(self):
+        self.governor.update({'RateLimit-Limit': '100',
+                              'RateLimit-Remaining': '0',
+                              'RateLimit-Reset': '1060'})
+        self.assertEqual(self.governor.reserve(now=1000), 60)
+        self.assertEqual(self.governor.reserve(now=1030), 30)
+        self.assertEqual(self.governor.reserve(now=1061), 0)
@@ -0,0 +1,90 @@
+import json
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import requests
+
+import dosa
+from dosa.retry import RetryPolicy, parse_retry_after
+
+
+def make_response(status_code, body='', headers=None):
+    resp = MagicMock(status_code=status_code, text=body,
+                     headers=headers or {})
+    resp.content = json.dumps({'id': 'error', 'message': body}).encode()
+    return resp
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(retries=2)
+
+    def test_idempotency(self):
+        self.assertTrue(self.policy.should_retry('GET', 0, status_code=503))
+        self.assertTrue(self.policy.should_retry('PUT', 0))
+        self.assertFalse(self.policy.should_retry('POST', 0, status_code=500))
+        self.assertFalse(self.policy.should_retry('POST', 0))
+        self.assertTrue(self.policy.should_retry('POST', 0, status_code=429))
+        self.assertTrue(self.policy.should_retry('POST', 0, sent=False))
+        self.assertTrue(RetryPolicy(retry_post=True).should_retry(
+            'POST', 0, status_code=500))
+
+    def test_retries_exhausted(self):
+        self.assertFalse(self.policy.should_retry('GET', 2, status_code=503))
+        self.assertFalse(self.policy.should_retry('GET', 0, status_code=404))
+
+    def test_delay(self):
+        self.assertEqual(self.policy.delay(0, retry_after='7'), 7)
+        for attempt in range(5):
+            delay = self.policy.delay(attempt)
+            self.assertTrue(0 <= delay <= min(30, 0.5 * 2 ** attempt))
+
+    def test_parse_retry_after(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'),
+                         0)
+
+
+@patch('dosa.retry.time.sleep')
+class TestClientRetry(TestCase):
+    def setUp(self):
+        self.client = dosa.Client('my_fake_api_key')
+
+    @patch('requests.Session.get')
+    def test_get_retried(self, mock_get, mock_sleep):
+        ok = make_response(200, '{"droplets": []}')
+        ok.content = json.dumps({'droplets': []}).encode()
+        mock_get.side_effect = [make_response(503, 'unavailable'), ok]
+        status, result = self.client.droplets.list()
+        self.assertEqual(status, 200)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @patch('requests.Session.post')
+    def test_post_not_retried_on_server_error(self, mock_post, mock_sleep):
+        mock_post.return_value = make_response(500, 'oops')
+        with self.assertRaises(dosa.ServerError) as cm:
+            self.client.keys.create(name='key', public_key='ssh-rsa AAAA')
+        self.assertEqual(mock_post.call_count, 1)
+        error = cm.exception
+        self.assertEqual(error.status_code, 500)
+        self.assertEqual(error.method, 'POST')
+        self.assertEqual(error.body['message'], 'oops')
+        self.assertIsNotNone(error.elapsed)
+
+    @patch('requests.Session.post')
+    def test_rate_limited_post(self, mock_post, mock_sleep):
+        mock_post.return_value = make_response(
+            429, 'slow down', {'Retry-After': '3'})
+        with self.assertRaises(dosa.RateLimitError):
+            self.client.keys.create(name='key', public_key='ssh-rsa AAAA')
+        self.assertEqual(mock_post.call_count, 4)
+        mock_sleep.assert_called_with(3)
+
+    @patch('requests.Session.get')
+    def test_connection_error(self, mock_get, mock_sleep):
+        mock_get.side_effect = requests.exceptions.ConnectionError('reset')
+        with self.assertRaises(dosa.APIConnectionError) as cm:
+            self.client.droplets.list()
+        self.assertEqual(mock_get.call_count, 4)
+        self.assertIsNone(cm.exception.status_code)
@@ -0,0 +1,101 @@
+import os.path
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import dosa
+from dosa.store import InventoryStore
+from dosa.transport import MemoryTransport
+
+
+def droplet(id, name, region='nyc1', status='active'):
+    return {'id': id, 'name': name, 'status': status,
+            'region': {'slug': region}}
+
+
+def listing(droplets):
+    return {'droplets': droplets, 'links': {},
+            'meta': {'total': len(droplets)}}
+
+
+class TestInventoryStore(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'inventory.db')
+        self.store = InventoryStore(self.path)
+        self.transport = MemoryTransport()
+        self.client = dosa.Client('my_fake_api_key',
+                                  transport=self.transport)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_incremental_refresh(self):
+        self.transport.add('GET', 'droplets', listing(
+            [droplet(1, 'web'), droplet(2, 'db'), droplet(3, 'cache')]))
+        self.transport.add('GET', 'droplets', listing(
+            [droplet(1, 'web'), droplet(2, 'db', status='off'),
+             droplet(4, 'worker', 'sfo2')]))
+        self.assertEqual(self.store.refresh(self.client.droplets), 3)
+        # 2 changed, 3 deleted and 4 added
+        self.assertEqual(self.store.refresh(self.client.droplets), 3)
+
+        self.assertEqual(
+            [obj['id'] for obj in self.store.find('droplets')], [1, 2, 4])
+        self.assertEqual(self.store.find('droplets', status='off'),
+                         [droplet(2, 'db', status='off')])
+        self.assertEqual(
+            self.store.find(self.client.droplets, region='sfo2')[0]['name'],
+            'worker')
+        self.assertEqual(self.store.get('droplets', 4)['name'], 'worker')
+        self.assertIsNone(self.store.get('droplets', 3))
+        with self.assertRaises(ValueError):
+            self.store.find('droplets', memory=1024)
+
+    def test_shared_and_warm(self):
+        self.transport.add('GET', 'droplets', listing([droplet(1, 'web')]))
+        self.store.load(self.client.droplets, max_age=300)
+        self.assertEqual(len(self.transport.requests), 1)
+
+        # another process
+        other = InventoryStore(self.path)
+        self.assertEqual(other.load(self.client.droplets, max_age=300),
+                         [droplet(1, 'web')])
+        self.assertEqual(len(self.transport.requests), 1)
+
+        refreshed_at = other.refreshed_at('droplets')
+        with patch('dosa.store.time.time', return_value=refreshed_at + 301):
+            other.load(self.client.droplets, max_age=300)
+        self.assertEqual(len(self.transport.requests), 2)
+        other.close()
+
+    def test_refresh_client(self):
+        self.transport.add('GET', 'droplets', listing([droplet(1, 'web')]))
+        self.transport.add('GET', 'domains', {
+            'domains': [{'name': 'example.com', 'ttl': 1800}],
+            'links': {}, 'meta': {'total': 1}})
+        changes = self.store.refresh_client(
+            self.client, collections=('droplets', 'domains'))
+        self.assertEqual(changes, {'droplets': 1, 'domains': 1})
+        # domains are identified by name
+        self.assertEqual(self.store.get('domains', 'example.com')['ttl'],
+                         1800)
+        self.assertEqual(self.store.refresh_client(
+            self.client, collections=('droplets', 'domains')), {})
+
+    def test_client_attribute_names(self):
+        self.transport.add('GET', 'account/keys', {
+            'ssh_keys': [{'id': 5, 'name': 'deploy'}],
+            'links': {}, 'meta': {'total': 1}})
+        changes = self.store.refresh_client(self.client, collections=('keys',))
+        self.assertEqual(changes, {'keys': 1})
+        self.assertEqual(self.store.find('keys', name='deploy'),
+                         [{'id': 5, 'name': 'deploy'}])
+        self.assertEqual(self.store.find(self.client.keys),
+                         self.store.find('ssh_keys'))
+        self.assertEqual(self.store.get('keys', 5)['name'], 'deploy')
+        with self.assertRaises(ValueError):
+            self.store.find('key')
+        with self.assertRaises(ValueError):
+            self.store.get('droplets', 1)
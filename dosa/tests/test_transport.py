@@ -0,0 +1,139 @@
+import gzip
+import json
+import subprocess
+import sys
+import threading
+import time
+from http.server import (BaseHTTPRequestHandler, HTTPServer,
+                         ThreadingHTTPServer)
+from unittest import TestCase
+
+import dosa
+from dosa.retry import RetryPolicy
+from dosa.transport import (HTTPClientTransport, MemoryTransport,
+                            get_transport)
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        payload = gzip.compress(json.dumps(
+            {'path': self.path, 'droplets': []}).encode())
+        self.send_response(200)
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', '"abc"')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        payload = json.dumps({'droplet': json.loads(body)}).encode()
+        self.send_response(202)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestHTTPClientTransport(TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:%s' % self.server.server_address[1]
+        self.transport = HTTPClientTransport()
+        self.client = dosa.Client('my_fake_api_key', api_url=self.url,
+                                  transport=self.transport)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests(self):
+        status, result = self.client.droplets.list(page=2, per_page=None)
+        self.assertEqual(result['path'], '/v2/droplets?page=2')
+        status, result = self.client.droplets.send_req(
+            'POST', 'droplets', {'name': 'web'})
+        self.assertEqual((status, result['droplet']), (202, {'name': 'web'}))
+        # keep-alive connection is reused
+        self.assertEqual(len(self.transport.idle[('http', self.url[7:])]), 1)
+
+    def test_connection_refused(self):
+        self.server.server_close()
+        client = dosa.Client('my_fake_api_key', api_url=self.url,
+                             transport='http.client',
+                             retry=RetryPolicy(retries=0))
+        with self.assertRaises(dosa.APIConnectionError):
+            client.droplets.list()
+
+
+class IdleTimeoutHandler(Handler):
+    # server closes keep-alive connections idle for this long
+    timeout = 0.1
+
+
+class TestHTTPClientTransportDroppedConnection(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          IdleTimeoutHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:%s' % self.server.server_address[1]
+        self.transport = HTTPClientTransport()
+        self.client = dosa.Client('my_fake_api_key', api_url=self.url,
+                                  transport=self.transport,
+                                  retry=RetryPolicy(retries=0))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_post_after_idle(self):
+        self.client.droplets.list()
+        idle = self.transport.idle[('http', self.url[7:])]
+        stale = idle[0]
+        time.sleep(0.3)
+        # POSTs are not retried, a stale connection must not be used
+        status, result = self.client.droplets.send_req(
+            'POST', 'droplets', {'name': 'web'})
+        self.assertEqual(status, 202)
+        self.assertIsNot(idle[0], stale)
+
+
+class TestMemoryTransport(TestCase):
+    def test_canned_responses(self):
+        transport = MemoryTransport()
+        transport.add('GET', 'droplets/1', status_code=500)
+        transport.add('GET', 'droplets/1', {'droplet': {'status': 'new'}})
+        client = dosa.Client('my_fake_api_key', transport=transport,
+                             retry=RetryPolicy(backoff=0))
+        self.assertEqual(client.Droplet(1).status(), 'new')
+        self.assertEqual(client.Droplet(1).status(), 'new')
+        self.assertEqual(len(transport.requests), 3)
+        with self.assertRaises(dosa.NotFoundError):
+            client.Droplet(2).info()
+
+    def test_get_transport(self):
+        transport = MemoryTransport()
+        self.assertIs(get_transport(transport), transport)
+        self.assertIsInstance(get_transport('memory'), MemoryTransport)
+        with self.assertRaises(ValueError):
+            get_transport('curl')
+
+
+class TestLazyImport(TestCase):
+    def test_import_dosa_skips_http_stack(self):
+        code = ('import sys, dosa; '
+                'print("requests" in sys.modules, '
+                '"http.client" in sys.modules, '
+                '"email.utils" in sys.modules)')
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.split(), [b'False', b'False', b'False'])
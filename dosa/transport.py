@@ -0,0 +1,285 @@
+"""
+HTTP transports a Session sends requests with
+
+    client = dosa.Client(API_KEY, transport='http.client')
+
+requests: requests.Session with a keep-alive connection pool, default
+http.client: stdlib only, cheaper to import, keeps idle connections alive
+memory: canned responses, for tests
+
+A transport has request(method, url, params, data, headers), returning a
+response with status_code, headers, content and text, and close(). It
+raises dosa.exceptions.TransportError if no response is received.
+Libraries a transport needs are imported on its first request, so that
+`import dosa` stays cheap.
+"""
+import json
+import select
+import threading
+import zlib
+
+from urllib.parse import urlencode, urlsplit
+
+from dosa.exceptions import TransportError
+from dosa.retry import IDEMPOTENT_METHODS
+
+DEFAULT_TRANSPORT = 'requests'
+
+
+class Headers(dict):
+    """Case insensitive response headers"""
+
+    def __init__(self, items=()):
+        super().__init__((k.lower(), v) for (k, v) in items)
+
+    def __getitem__(self, key):
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super().__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super().get(key.lower(), default)
+
+
+class Response(object):
+
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+
+class RequestsTransport(object):
+    """
+    requests.Session keeping up to `pool_size` connections open to
+    `api_url`
+    """
+
+    def __init__(self, pool_size=10, api_url=None):
+        self.pool_size = pool_size
+        self.api_url = api_url
+        self.lock = threading.Lock()
+        self.requests = None
+        self.http = None
+
+    def connect(self):
+        with self.lock:
+            if self.http is None:
+                import requests
+                http = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size)
+                http.mount(self.api_url or 'https://', adapter)
+                self.requests = requests
+                self.http = http
+        return self.http
+
+    def request(self, method, url, params, data, headers):
+        http = self.http or self.connect()
+        exceptions = self.requests.exceptions
+        try:
+            # eg. 'GET' -> http.get
+            return getattr(http, method.lower())(
+                url, params=params, data=data, headers=headers)
+        except exceptions.RequestException as e:
+            # on connect timeout, request surely didn't reach the API
+            raise TransportError(str(e), sent=not isinstance(
+                e, exceptions.ConnectTimeout)) from e
+
+    def close(self):
+        if self.http is not None:
+            self.http.close()
+
+
+def is_dropped(sock):
+    """
+    True if server closed idle connection `sock` (or sent something
+    unasked), that is if it is readable, as urllib3 checks before reuse
+    """
+    try:
+        if hasattr(select, 'poll'):
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)
+            return bool(poller.poll(0))
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class HTTPClientTransport(object):
+    """
+    stdlib http.client, keeps up to `pool_size` idle keep-alive
+    connections per host. Responses are asked to be gzip compressed.
+
+    @timeout: socket timeout in seconds
+    """
+
+    def __init__(self, pool_size=10, api_url=None, timeout=60):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # (scheme, host) -> idle connections
+        self.idle = {}
+        self.client = None
+
+    def get_connection(self, scheme, host):
+        """
+        Returns (connection, True if it was used before). Idle connections
+        closed by server meanwhile are dropped, so that requests which
+        can't be retried (POSTs) aren't sent on them
+        """
+        while True:
+            with self.lock:
+                idle = self.idle.get((scheme, host))
+                conn = idle and idle.pop()
+            if not conn:
+                break
+            if conn.sock is not None and not is_dropped(conn.sock):
+                return conn, True
+            conn.close()
+        if self.client is None:
+            import http.client
+            self.client = http.client
+        if scheme == 'https':
+            conn = self.client.HTTPSConnection(host, timeout=self.timeout)
+        else:
+            conn = self.client.HTTPConnection(host, timeout=self.timeout)
+        return conn, False
+
+    def put_connection(self, scheme, host, conn):
+        with self.lock:
+            idle = self.idle.setdefault((scheme, host), [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method, url, params, data, headers):
+        parts = urlsplit(url)
+        target = parts.path
+        # like requests, params set to None are left out
+        query = [(k, v) for (k, v) in (params or {}).items()
+                 if v is not None]
+        if parts.query or query:
+            target += '?' + '&'.join(filter(None, (
+                parts.query, urlencode(query))))
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        headers = dict(headers or {}, **{'Accept-Encoding': 'gzip'})
+
+        while True:
+            conn, reused = self.get_connection(parts.scheme, parts.netloc)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+            except OSError as e:
+                conn.close()
+                raise TransportError(str(e), sent=False) from e
+            try:
+                conn.request(method, target, body=data, headers=headers)
+                resp = conn.getresponse()
+                content = resp.read()
+            except (OSError, self.client.HTTPException) as e:
+                conn.close()
+                # server may have closed an idle connection meanwhile
+                # (RemoteDisconnected is a ConnectionError)
+                if (reused and method in IDEMPOTENT_METHODS and
+                        isinstance(e, ConnectionError)):
+                    continue
+                raise TransportError(str(e)) from e
+            break
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self.put_connection(parts.scheme, parts.netloc, conn)
+        resp_headers = Headers(resp.getheaders())
+        if resp_headers.get('Content-Encoding') == 'gzip':
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        return Response(resp.status, resp_headers, content)
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class MemoryTransport(object):
+    """
+    Serves canned responses, for tests
+
+        transport = MemoryTransport()
+        transport.add('GET', 'droplets', {'droplets': [],
+                                          'meta': {'total': 0}})
+        client = dosa.Client(API_KEY, transport=transport)
+
+    Responses of a (method, path) are served in the order they were
+    added, the last one is repeated. Unknown paths get a 404. Requests
+    are recorded in `requests` as (method, path, params, data).
+    """
+
+    def __init__(self, pool_size=None, api_url=None):
+        self.lock = threading.Lock()
+        self.responses = {}
+        self.requests = []
+
+    def add(self, method, path, body=None, status_code=200, headers=None):
+        """
+        @path: path after API version, eg. droplets/1234
+        @body: object sent as json, or a callable called with request
+            params returning one
+        """
+        self.responses.setdefault((method, path), []).append(
+            (status_code, body, headers or {}))
+
+    def request(self, method, url, params, data, headers):
+        # eg. /v2/droplets/1234 -> droplets/1234
+        path = urlsplit(url).path.split('/', 2)[-1]
+        with self.lock:
+            self.requests.append((method, path, params, data))
+            responses = self.responses.get((method, path))
+            if not responses:
+                response = (404, {'id': 'not_found', 'message': path}, {})
+            elif len(responses) > 1:
+                response = responses.pop(0)
+            else:
+                response = responses[0]
+        status_code, body, resp_headers = response
+        if callable(body):
+            body = body(params)
+        content = b'' if body is None else json.dumps(body).encode('utf-8')
+        return Response(status_code, Headers(resp_headers.items()), content)
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {
+    'requests': RequestsTransport,
+    'http.client': HTTPClientTransport,
+    'memory': MemoryTransport,
+}
+
+
+def get_transport(transport=None, **kw):
+    """
+    Returns `transport` if it is a transport object, else a new transport
+    of that name, DEFAULT_TRANSPORT if None, created with `kw`
+    """
+    if transport is None:
+        transport = DEFAULT_TRANSPORT
+    if not isinstance(transport, str):
+        return transport
+    if transport not in TRANSPORTS:
+        raise ValueError('Unknown transport %r, one of: %s' % (
+            transport, ', '.join(sorted(TRANSPORTS))))
+    return TRANSPORTS[transport](**kw)
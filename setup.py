@@ -17,10 +17,11 @@ setup(
     description='Python wrapper for Digital Ocean API V2',
     long_description=open("README.md").read(),
     long_description_content_type="text/markdown",
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     author='Shekhar Tiwatne',
     author_email='pythonic@gmail.com',
     license="http://www.opensource.org/licenses/mit-license.php",
     test_suite="tests",
-    install_requires=['requests']
+    install_requires=['requests'],
+    extras_require={'async': ['aiohttp'], 'fast': ['orjson']}
     )